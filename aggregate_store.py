@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, List
+
+
+class DailyAggregateStore:
+    """
+    Persists per-day entity/topic/project/people aggregates and scoring rows,
+    together with the fingerprint of the documents they were computed from and
+    references to those documents (including each document's content digest). A day whose
+    fingerprint is unchanged can be merged from the store instead of being
+    analyzed again.
+    """
+
+    def __init__(self, store_file: str, retention_days: int = 400):
+        """
+        Args:
+            store_file: Path to the SQLite database backing the store
+            retention_days: Days older than this are pruned on save
+        """
+        self.store_file = store_file
+        self.retention_days = retention_days
+
+        directory = os.path.dirname(store_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS days (
+                    day TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    aggregates TEXT NOT NULL,
+                    documents TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    rows TEXT NOT NULL DEFAULT '[]'
+                )
+            """)
+            # Stores created before scoring rows were kept
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(days)")}
+            if 'rows' not in columns:
+                conn.execute("ALTER TABLE days ADD COLUMN rows TEXT NOT NULL DEFAULT '[]'")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.store_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load_index(self, day: str):
+        """
+        Fingerprint and document digests recorded for a day.
+
+        Returns:
+            (fingerprint, Counter of document digests), or None if the day isn't stored
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT fingerprint, documents FROM days WHERE day = ?", (day,)).fetchone()
+        if row is None:
+            return None
+        fingerprint, documents = row
+        return fingerprint, Counter(document.get('digest') for document in json.loads(documents))
+
+    def load_aggregates(self, day: str) -> Dict[str, Counter]:
+        """Entity Counters stored for a day"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT aggregates FROM days WHERE day = ?", (day,)).fetchone()
+        if row is None:
+            return {}
+        return {entity_type: Counter(counts) for entity_type, counts in json.loads(row[0]).items()}
+
+    def load_rows(self, day: str) -> List[list]:
+        """Scoring rows stored for a day, as (source, attendees, duration, {entity: count}) lists"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT rows FROM days WHERE day = ?", (day,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save(self, day: str, fingerprint: str, entities: Dict[str, Counter], documents: List[Dict],
+             scoring_rows: List[tuple] = ()):
+        """Store (or replace) the aggregates for one day"""
+        self.save_many([(day, fingerprint, entities, documents, scoring_rows)])
+
+    def save_many(self, rows: List[tuple]):
+        """Store many (day, fingerprint, entities, documents, scoring_rows) rows and prune expired days"""
+        now = time.time()
+        encoded = [
+            (day, fingerprint,
+             json.dumps({entity_type: dict(counts) for entity_type, counts in entities.items()}),
+             json.dumps(documents), now, json.dumps(list(scoring_rows)))
+            for day, fingerprint, entities, documents, scoring_rows in rows
+        ]
+        cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO days (day, fingerprint, aggregates, documents, updated, rows) "
+                "VALUES (?, ?, ?, ?, ?, ?)", encoded
+            )
+            conn.execute("DELETE FROM days WHERE day < ?", (cutoff,))
+
+    def documents(self, day: str) -> List[Dict]:
+        """References to the documents behind a stored day"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT documents FROM days WHERE day = ?", (day,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def clear(self):
+        """Forget every stored day"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM days")
@@ -1,20 +1,145 @@
 import re
+import time
+import hashlib
+import multiprocessing
 from collections import Counter, defaultdict
-import spacy
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Iterable, List, Dict, Tuple
+from config import Config
+from keyword_matcher import KeywordMatcher, load_keyword_file
+from gazetteer import Gazetteer, load_gazetteer_file
+from context_index import ContextIndex
+from ner_cache import NERCache
+from aggregate_store import DailyAggregateStore
+from spill_store import SpillStore
+from streaming import prefetch
+from text_normalizer import normalize_document
+from scoring import ScoringMatrix, ScoringPolicy
+from records import as_event, as_message
+from profiling import Timeline
+
+# Components shipped with the en_core_web_* pipelines that NER does not depend on.
+# The CPU pipelines give 'ner' its own embedded tok2vec, so the shared one can go too.
+NER_UNUSED_COMPONENTS = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter']
+
+# Entity recognition modes, slowest and most thorough first:
+#   full      - every document goes through the spaCy model
+#   hybrid    - gazetteer first; only documents it finds nothing in go through the model
+#   gazetteer - gazetteer only; the model is never loaded
+NER_MODES = ('full', 'hybrid', 'gazetteer')
+
+# Graph properties each mode reads, per source (what EventRecord/MessageRecord.from_graph
+# look at), so fetchers can $select just these. Every mode analyzes event bodies; sent
+# emails are analyzed from their preview, so their full bodies are never needed.
+MODE_FIELDS = {
+    mode: {
+        'calendar': ('subject', 'body', 'start', 'end', 'organizer', 'attendees', 'seriesMasterId'),
+        'email': ('subject', 'bodyPreview', 'sentDateTime', 'toRecipients', 'ccRecipients'),
+    }
+    for mode in NER_MODES
+}
+
+# Project patterns (PoC, PoV, etc.) - only evaluated when a trigger keyword was matched
+PROJECT_TRIGGERS = {'poc', 'pov', 'pilot', 'proof of concept', 'proof of value'}
+PROJECT_PATTERNS = [
+    re.compile(r'(?i)(poc|pov|pilot|proof of (?:concept|value))\s+(?:for|with|at)?\s+([A-Z][a-zA-Z\s]+)'),
+    re.compile(r'(?i)([A-Z][a-zA-Z\s]+)\s+(?:poc|pov|pilot)'),
+]
+
+# Bump when the way documents are counted changes, so stored daily aggregates are recomputed
+AGGREGATE_VERSION = 3
+
+
+def required_fields(mode: str) -> Dict[str, Tuple[str, ...]]:
+    """Graph properties an entity recognition mode needs: {'calendar': (...), 'email': (...)}"""
+    return MODE_FIELDS[DataAnalyzer._check_mode(mode)]
+
+
+def load_ner_pipeline(model_name: str = None):
+    """Load a spaCy pipeline trimmed down to the components needed for doc.ents"""
+    import spacy  # Imported here so gazetteer mode doesn't pay for it
+    model_name = model_name or Config.NLP_MODEL
+    try:
+        return spacy.load(model_name, exclude=NER_UNUSED_COMPONENTS)
+    except OSError:
+        print("Downloading spaCy model...")
+        import subprocess
+        subprocess.run(['python', '-m', 'spacy', 'download', model_name])
+        return spacy.load(model_name, exclude=NER_UNUSED_COMPONENTS)
+
+
+def extract_projects(text: str, keywords) -> List[str]:
+    """Extract PoC/PoV/pilot project names, skipping texts with no trigger keyword"""
+    if not PROJECT_TRIGGERS & keywords:
+        return []
+    
+    projects = []
+    for pattern in PROJECT_PATTERNS:
+        for match in pattern.finditer(text):
+            project_name = ' '.join(match.groups()).strip()
+            if project_name:
+                projects.append(project_name)
+    return projects
+
+
+def doc_entities(doc) -> List[Tuple[str, str]]:
+    """(label, text) for each entity spaCy found in a doc"""
+    return [(ent.label_, ent.text) for ent in doc.ents]
+
+
+def extract_features(text: str, entities: List[Tuple[str, str]], keyword_matcher: KeywordMatcher) -> Dict:
+    """Reduce one analyzed document (its (label, text) entities) to the features the ranking needs"""
+    keywords = keyword_matcher.find(text)
+    return {
+        'organizations': [name for label, name in entities if label == 'ORG'],
+        'people': [name for label, name in entities if label == 'PERSON'],
+        'topics': sorted(keywords),
+        'projects': extract_projects(text, keywords)
+    }
+
+
+# Per-process state for parallel mode, set up once by the pool initializer
+_worker_state = {}
+
+
+def _init_worker(model_name: str, keywords: List[str], batch_size: int):
+    """Load the model once in each worker process"""
+    _worker_state['nlp'] = load_ner_pipeline(model_name)
+    _worker_state['matcher'] = KeywordMatcher(keywords)
+    _worker_state['batch_size'] = batch_size
+
+
+def _analyze_shard(texts: List[str]) -> List[Dict]:
+    """Worker entry point: features for a shard of texts, in input order"""
+    nlp = _worker_state['nlp']
+    matcher = _worker_state['matcher']
+    return [
+        extract_features(text, doc_entities(doc), matcher)
+        for text, doc in zip(texts, nlp.pipe(texts, batch_size=_worker_state['batch_size']))
+    ]
+
 
 class DataAnalyzer:
     """Analyzes calendar and email data to extract top topics, customers, and projects"""
     
-    def __init__(self):
-        # Load spaCy model for NLP
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            print("Downloading spaCy model...")
-            import subprocess
-            subprocess.run(['python', '-m', 'spacy', 'download', 'en_core_web_sm'])
-            self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, batch_size: int = None, use_cache: bool = None, incremental: bool = None,
+                 workers: int = None, chunk_size: int = None, mode: str = None, bounded: bool = None):
+        # Default entity recognition mode; analyze_data can override it per call
+        self.mode = self._check_mode(mode or Config.NER_MODE)
+        
+        # Load spaCy model for NLP (NER only - we never read tags, parses or lemmas).
+        # Gazetteer mode never needs it, so it's only loaded on first use there.
+        self.model_name = Config.NLP_MODEL
+        self._nlp = None
+        if self.mode != 'gazetteer':
+            self._nlp = load_ner_pipeline(self.model_name)
+        self.batch_size = batch_size or Config.NLP_BATCH_SIZE
+        
+        # Optional process pool for NLP; each worker loads its own copy of the model
+        self.workers = Config.ANALYZER_WORKERS if workers is None else workers
+        self.chunk_size = chunk_size or Config.ANALYZER_CHUNK_SIZE
+        self._pool = None
         
         # Common tech/business terms to look for
         self.tech_keywords = {
@@ -25,186 +150,679 @@ class DataAnalyzer:
             'workload', 'cluster', 'node', 'container', 'docker', 'ray',
             'distributed', 'optimization', 'efficiency', 'performance'
         }
+        if Config.TECH_KEYWORDS_FILE:
+            self.tech_keywords |= load_keyword_file(Config.TECH_KEYWORDS_FILE)
         
-    def analyze_data(self, calendar_events: List[Dict], sent_emails: List[Dict]) -> Dict:
+        # One precompiled matcher for the whole vocabulary (word-boundary aware)
+        self.keyword_matcher = KeywordMatcher(self.tech_keywords)
+        
+        # Known customers/people for the gazetteer and hybrid modes
+        self.gazetteer = load_gazetteer_file(Config.GAZETTEER_FILE) if Config.GAZETTEER_FILE else Gazetteer()
+        
+        # Persistent per-document cache so unchanged documents skip NLP entirely
+        # (keys are namespaced per mode, see _cache_namespace)
+        self._namespaces = {}
+        use_cache = Config.NER_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = NERCache(
+            Config.NER_CACHE_FILE,
+            max_bytes=Config.NER_CACHE_MAX_MB * 1024 * 1024
+        ) if use_cache else None
+        
+        # Per-day aggregates so unchanged days are merged instead of re-analyzed
+        incremental = Config.INCREMENTAL_ANALYSIS if incremental is None else incremental
+        self.aggregate_store = DailyAggregateStore(
+            Config.AGGREGATE_STORE_FILE,
+            retention_days=Config.AGGREGATE_RETENTION_DAYS
+        ) if incremental else None
+        
+        # Bounded-memory mode: cap in-flight documents and spill per-run state to disk
+        self.bounded = Config.BOUNDED_MEMORY if bounded is None else bounded
+        
+    @staticmethod
+    def _check_mode(mode: str) -> str:
+        if mode not in NER_MODES:
+            raise ValueError(f"Unknown NER mode '{mode}' (expected one of: {', '.join(NER_MODES)})")
+        return mode
+    
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded on first use"""
+        if self._nlp is None:
+            self._nlp = load_ner_pipeline(self.model_name)
+        return self._nlp
+    
+    def _cache_namespace(self, mode: str) -> str:
+        """Identify the mode, model, vocabulary and gazetteer that produced a cached result"""
+        if mode not in self._namespaces:
+            vocabulary = hashlib.sha256('\n'.join(sorted(self.tech_keywords)).encode('utf-8')).hexdigest()
+            parts = [mode, vocabulary]
+            if mode != 'gazetteer':
+                meta = self.nlp.meta
+                parts.append(f"{meta.get('lang')}_{meta.get('name')}:{meta.get('version')}")
+            if mode != 'full':
+                parts.append(self.gazetteer.fingerprint)
+            self._namespaces[mode] = ':'.join(parts)
+        return self._namespaces[mode]
+    
+    def analyze_data(self, calendar_events: Iterable[Dict], sent_emails: Iterable[Dict],
+                     mode: str = None, policy: ScoringPolicy = None, timeline: Timeline = None) -> Dict:
         """
         Analyze calendar and email data to extract insights
         
+        Documents are consumed as they arrive, so generators (e.g. paged Graph
+        fetches) can be passed in and NLP starts before the last page is
+        downloaded. Each source is drained on a background thread, bounded by
+        Config.STREAM_PREFETCH_ITEMS, and raw documents are dropped as soon as
+        they've been reduced to the fields the analysis needs.
+        
+        In bounded-memory mode the prefetch threads buffer at most
+        Config.MAX_INFLIGHT_DOCS already-normalized documents per source, NLP
+        batches are capped at the same size, and per-day aggregates, documents
+        held back for the incremental check and context sentences are spilled
+        to a temporary database, so memory no longer grows with the mailbox.
+        
         Args:
-            calendar_events: List of calendar event dictionaries
-            sent_emails: List of sent email dictionaries
+            calendar_events: Iterable of EventRecords (or raw event dicts from any source)
+            sent_emails: Iterable of MessageRecords (or raw email dicts from any source)
+            mode: Entity recognition mode for this call (defaults to self.mode)
+            policy: How organization mentions are weighted when ranking
+                    (defaults to the SCORE_* settings in Config)
+            timeline: Records how long each analyzer phase took (analyze.*)
             
         Returns:
             Dictionary containing analyzed data with top entities
         """
-        # Extract entities from calendar
-        calendar_entities = self._extract_calendar_entities(calendar_events)
-        
-        # Extract entities from emails
-        email_entities = self._extract_email_entities(sent_emails)
-        
-        # Combine and rank entities
-        combined_entities = self._combine_entities(calendar_entities, email_entities)
-        
-        # Extract top items with context
-        top_items = self._extract_top_items(combined_entities, calendar_events, sent_emails)
+        timeline = timeline or Timeline()
+        with timeline.span('analyze'):
+            run = _AnalysisRun(self, self._check_mode(mode or self.mode), timeline)
+            try:
+                # Start downloading emails while calendar events are being analyzed
+                if run.spill is not None:
+                    # Normalize on the prefetch threads, so only compact documents are buffered
+                    calendar_stream = self._timed(prefetch(map(run.normalize_event, calendar_events),
+                                                           Config.MAX_INFLIGHT_DOCS), timeline, 'analyze.wait_for_data')
+                    email_stream = self._timed(prefetch(map(run.normalize_email, sent_emails),
+                                                        Config.MAX_INFLIGHT_DOCS), timeline, 'analyze.wait_for_data')
+                else:
+                    calendar_stream = map(run.normalize_event, self._timed(
+                        prefetch(calendar_events, Config.STREAM_PREFETCH_ITEMS), timeline, 'analyze.wait_for_data'))
+                    email_stream = map(run.normalize_email, self._timed(
+                        prefetch(sent_emails, Config.STREAM_PREFETCH_ITEMS), timeline, 'analyze.wait_for_data'))
+                for event in calendar_stream:
+                    run.add_event(event)
+                for email in email_stream:
+                    run.add_email(email)
+                daily_entities = run.finish()
+                
+                with timeline.span('analyze.rank'):
+                    # Combine and rank entities (in day order, so ties break the same way every run)
+                    days = sorted(daily_entities, key=lambda d: d or '')
+                    combined_entities = self._combine_entities(*(daily_entities[day] for day in days))
+                    
+                    # Document x organization matrix for weighted ranking
+                    scoring_matrix = ScoringMatrix(combined_entities['organizations'])
+                    for day in days:
+                        scoring_matrix.add_rows(day, run.rows(day))
+                    policy = policy or ScoringPolicy()
+                
+                # Extract top items with context
+                with timeline.span('analyze.context'):
+                    top_items = self._extract_top_items(combined_entities, run.context_index, scoring_matrix, policy)
+                calendar_unique_count = run.unique_event_count()
+                memory_stats = run.memory_stats()
+            finally:
+                run.close()
         
         return {
             'top_items': top_items,
-            'calendar_count': len(calendar_events),
-            'email_count': len(sent_emails),
-            'entities': combined_entities
+            'mode': run.mode,
+            'scoring_matrix': scoring_matrix,
+            'scoring_policy': policy.to_dict(),
+            'calendar_count': run.calendar_count,
+            'calendar_unique_count': calendar_unique_count,
+            'email_count': run.email_count,
+            'entities': combined_entities,
+            'cache_stats': self._cache_stats(run.cache_stats),
+            'incremental_stats': {
+                'enabled': self.aggregate_store is not None,
+                'days_total': len(run.days),
+                'days_reused': len(run.reused_days),
+                'days_analyzed': len(run.days) - len(run.reused_days)
+            },
+            'memory_stats': memory_stats
         }
     
-    def _extract_calendar_entities(self, events: List[Dict]) -> Dict:
-        """Extract entities from calendar events"""
-        entities = {
+    @staticmethod
+    def _timed(iterable: Iterable, timeline: Timeline, stage: str):
+        """Re-yield items, accumulating the time spent waiting for each one into a stage"""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                timeline.add(stage, time.perf_counter() - started)
+                return
+            timeline.add(stage, time.perf_counter() - started, 1)
+            yield item
+    
+    @staticmethod
+    def _empty_entities() -> Dict:
+        return {
             'organizations': Counter(),
             'topics': Counter(),
             'projects': Counter(),
             'people': Counter()
         }
+    
+    def _compact_event(self, event) -> Dict:
+        """Reduce a calendar event (record or raw dict from any source) to the fields the analysis reads"""
+        event = as_event(event)
+        # Combine subject and body for analysis; Graph bodies are HTML with join boilerplate
+        body = normalize_document(event.body, event.body_type, Config.MAX_DOC_CHARS, Config.MAX_DOC_TOKENS,
+                                  invite=True)
+        text = f"{event.subject} {body}"
+        series = event.series or event.organizer
+        attendees = event.attendee_count
+        duration = event.duration_minutes
+        return {
+            'id': event.id,
+            'day': self._to_day(event.start),
+            'subject': event.subject,
+            'text': text,
+            'series': series,
+            'attendees': attendees,
+            'duration': duration,
+            'digest': hashlib.sha256(
+                f"event\0{series}\0{attendees}\0{duration}\0{text}".encode('utf-8')
+            ).hexdigest()
+        }
+    
+    def _compact_email(self, email) -> Dict:
+        """Reduce a sent email (record or raw dict from any source) to the fields the analysis reads"""
+        email = as_message(email)
+        # Combine subject and body preview
+        text = f"{email.subject} {normalize_document(email.preview, 'text', Config.MAX_DOC_CHARS, Config.MAX_DOC_TOKENS)}"
+        return {
+            'id': email.id,
+            'day': self._to_day(email.sent),
+            'subject': email.subject,
+            'preview': email.preview,
+            'text': text,
+            'recipient_count': len(email.recipients),
+            # First label of each recipient domain ('initech' for jane@initech.com)
+            'domains': [domain.split('.', 1)[0] for domain in email.domains],
+            'digest': hashlib.sha256(f"email\0{text}\0{';'.join(email.recipients)}".encode('utf-8')).hexdigest()
+        }
+    
+    @staticmethod
+    def _to_day(value):
+        """Reduce a datetime to YYYY-MM-DD; None when the source gave no usable date"""
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        return None
+    
+    def _day_fingerprint(self, digests: List[str], mode: str) -> str:
+        """Hash everything a day's aggregates depend on: mode, model, vocabulary and document content"""
+        fingerprint = hashlib.sha256(f"{AGGREGATE_VERSION}\0{self._cache_namespace(mode)}".encode('utf-8'))
+        for digest in sorted(digests):
+            fingerprint.update(digest.encode('ascii'))
+        return fingerprint.hexdigest()
+    
+    def _iter_docs(self, texts: List[str]):
+        """Stream texts through the NER pipeline in batches, yielding docs in input order"""
+        return self.nlp.pipe(texts, batch_size=self.batch_size)
+    
+    def _analyze_texts(self, texts: List[str], stats: Dict, mode: str) -> List[Dict]:
+        """
+        Extract per-document features (entities, keywords, projects), serving
+        unchanged documents from the cache and sending only misses through NLP.
+        """
+        if self.cache is None:
+            unique = list(dict.fromkeys(texts))
+            features = dict(zip(unique, self._extract_features_batch(unique, mode)))
+            return [features[text] for text in texts]
         
-        for event in events:
-            subject = event.get('subject', '')
-            body = event.get('body', {}).get('content', '')
-            
-            # Combine subject and body for analysis
-            text = f"{subject} {body}"
+        namespace = self._cache_namespace(mode)
+        keys = [self.cache.key_for(text, namespace) for text in texts]
+        cached = self.cache.get_many(keys)
+        stats['hits'] += len(cached)
+        
+        # Analyze each distinct missing document once
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        stats['misses'] += len(missing)
+        fresh = list(zip(missing, self._extract_features_batch(list(missing.values()), mode)))
+        self.cache.put_many(fresh)
+        cached.update(fresh)
+        
+        return [cached[key] for key in keys]
+    
+    def _extract_features_batch(self, texts: List[str], mode: str = 'full') -> List[Dict]:
+        """
+        Recognize entities in texts and return their features in input order.
+        
+        Gazetteer mode only consults the gazetteer. Hybrid mode keeps the
+        gazetteer's entities for every text it recognizes something in and
+        sends just the remaining texts through the model.
+        """
+        if mode == 'full':
+            return self._model_features_batch(texts)
+        
+        features = []
+        unmatched = []
+        for position, text in enumerate(texts):
+            entities = self.gazetteer.entities(text)
+            if entities or mode == 'gazetteer':
+                features.append(extract_features(text, entities, self.keyword_matcher))
+            else:
+                features.append(None)
+                unmatched.append(position)
+        
+        model_features = self._model_features_batch([texts[position] for position in unmatched])
+        for position, text_features in zip(unmatched, model_features):
+            features[position] = text_features
+        return features
+    
+    def _model_features_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Run the NLP model over texts and return their features in input order.
+        
+        In parallel mode the texts are split into chunk_size shards and mapped over
+        the process pool. Executor.map returns shards in submission order, so the
+        result (and everything counted from it) is identical to the serial path.
+        """
+        if not texts:
+            return []
+        if self.workers > 1 and len(texts) > self.chunk_size:
+            shards = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+            features = []
+            for shard_features in self._get_pool().map(_analyze_shard, shards):
+                features.extend(shard_features)
+            return features
+        
+        return [self._extract_features(text, doc) for text, doc in zip(texts, self._iter_docs(texts))]
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use and keep it warm for later runs"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # spawn, not fork: the analyzer runs alongside prefetch and Flask threads
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_name, sorted(self.tech_keywords), self.batch_size)
+            )
+        return self._pool
+    
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def _extract_features(self, text: str, doc) -> Dict:
+        """Reduce one analyzed document to the features the ranking needs"""
+        return extract_features(text, doc_entities(doc), self.keyword_matcher)
+    
+    def _cache_stats(self, run_stats: Dict) -> Dict:
+        """Cache hits/misses for the current run plus the state of the store"""
+        if self.cache is None:
+            return {'enabled': False}
+        lookups = run_stats['hits'] + run_stats['misses']
+        store = self.cache.stats()
+        return {
+            'enabled': True,
+            'hits': run_stats['hits'],
+            'misses': run_stats['misses'],
+            'hit_rate': round(run_stats['hits'] / lookups, 3) if lookups else 0.0,
+            'evictions': store['evictions'],
+            'entries': store['entries'],
+            'size_bytes': store['size_bytes']
+        }
+    
+    def _extract_calendar_entities(self, events: List[Dict], daily_entities: Dict, daily_rows: Dict, analyze):
+        """
+        Extract entities from compact calendar events into per-day counters,
+        and each event's organization mentions into per-day scoring rows
+        """
+        # Recurring meetings are analyzed once and counted once per occurrence
+        series = self._collapse_recurring(events)
+        texts = [event['text'] for event, _ in series]
+        
+        for (event, occurrences), features in zip(series, analyze(texts)):
+            entities = daily_entities[event['day']]
             
             # Extract organizations (likely customer names)
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == 'ORG':
-                    entities['organizations'][ent.text] += 1
-                elif ent.label_ == 'PERSON':
-                    entities['people'][ent.text] += 1
+            for org in features['organizations']:
+                entities['organizations'][org] += occurrences
+            if features['organizations']:
+                mentions = Counter(features['organizations'])
+                daily_rows[event['day']].append((
+                    'event', event['attendees'], event['duration'],
+                    {org: count * occurrences for org, count in mentions.items()}
+                ))
+            for person in features['people']:
+                entities['people'][person] += occurrences
             
             # Extract tech keywords and topics
-            text_lower = text.lower()
-            for keyword in self.tech_keywords:
-                if keyword in text_lower:
-                    entities['topics'][keyword] += 1
+            for keyword in features['topics']:
+                entities['topics'][keyword] += occurrences
             
             # Look for project patterns (PoC, PoV, etc.)
-            project_patterns = [
-                r'(?i)(poc|pov|pilot|proof of (?:concept|value))\s+(?:for|with|at)?\s+([A-Z][a-zA-Z\s]+)',
-                r'(?i)([A-Z][a-zA-Z\s]+)\s+(?:poc|pov|pilot)',
-            ]
-            for pattern in project_patterns:
-                matches = re.findall(pattern, text)
-                for match in matches:
-                    project_name = ' '.join(match).strip()
-                    if project_name:
-                        entities['projects'][project_name] += 1
-        
-        return entities
-    
-    def _extract_email_entities(self, emails: List[Dict]) -> Dict:
-        """Extract entities from sent emails"""
-        entities = {
-            'organizations': Counter(),
-            'topics': Counter(),
-            'projects': Counter(),
-            'people': Counter()
-        }
+            for project_name in features['projects']:
+                entities['projects'][project_name] += occurrences
+    
+    def _collapse_recurring(self, events: List[Dict]) -> List[Tuple[Dict, int]]:
+        """
+        Group occurrences of the same recurring meeting.
         
-        for email in emails:
-            subject = email.get('subject', '')
-            body_preview = email.get('bodyPreview', '')
-            
-            # Combine subject and body preview
-            text = f"{subject} {body_preview}"
+        Occurrences are grouped by series master ID when the source provides one
+        (Graph calendarView), otherwise by organizer. Day, subject and body are
+        always part of the key, so a group only ever contains identical texts on
+        one day and multiplying its counts by the occurrence count is exact.
+        Identical texts on different days are still only analyzed once.
+        
+        Returns:
+            List of (first occurrence, occurrence count) in first-seen order
+        """
+        groups = {}
+        for event in events:
+            key = (event['series'], event['day'], event['text'])
+            if key in groups:
+                groups[key][1] += 1
+            else:
+                groups[key] = [event, 1]
+        return [tuple(group) for group in groups.values()]
+    
+    def _extract_email_entities(self, emails: List[Dict], daily_entities: Dict, daily_rows: Dict, analyze):
+        """
+        Extract entities from compact sent emails into per-day counters, and
+        organization mentions and recipient domains into per-day scoring rows
+        """
+        texts = [email['text'] for email in emails]
+        
+        for email, features in zip(emails, analyze(texts)):
+            entities = daily_entities[email['day']]
+            rows = daily_rows[email['day']]
             
             # Extract organizations
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ == 'ORG':
-                    entities['organizations'][ent.text] += 2  # Weight emails higher
-                elif ent.label_ == 'PERSON':
-                    entities['people'][ent.text] += 1
+            for org in features['organizations']:
+                entities['organizations'][org] += 2  # Weight emails higher
+            if features['organizations']:
+                rows.append(('email', email['recipient_count'], 0.0, dict(Counter(features['organizations']))))
+            for person in features['people']:
+                entities['people'][person] += 1
             
             # Extract tech keywords
-            text_lower = text.lower()
-            for keyword in self.tech_keywords:
-                if keyword in text_lower:
-                    entities['topics'][keyword] += 2  # Weight emails higher
+            for keyword in features['topics']:
+                entities['topics'][keyword] += 2  # Weight emails higher
             
             # Extract recipients as potential customers/partners
-            recipients = email.get('toRecipients', []) + email.get('ccRecipients', [])
-            for recipient in recipients:
-                email_addr = recipient.get('emailAddress', {}).get('address', '')
-                # Extract domain as potential organization
-                if '@' in email_addr:
-                    domain = email_addr.split('@')[1].split('.')[0]
-                    if domain not in ['nvidia', 'gmail', 'outlook', 'hotmail']:
-                        entities['organizations'][domain.capitalize()] += 1
-        
-        return entities
-    
-    def _combine_entities(self, calendar_entities: Dict, email_entities: Dict) -> Dict:
+            domains = Counter()
+            for domain in email['domains']:
+                # Recipient domain as potential organization
+                if domain not in ['nvidia', 'gmail', 'outlook', 'hotmail']:
+                    entities['organizations'][domain.capitalize()] += 1
+                    domains[domain.capitalize()] += 1
+            if domains:
+                rows.append(('recipient', email['recipient_count'], 0.0, dict(domains)))
+    
+    def _combine_entities(self, *entity_sets: Dict) -> Dict:
         """Combine entities from calendar and email with weighted scoring"""
-        combined = {
-            'organizations': Counter(),
-            'topics': Counter(),
-            'projects': Counter(),
-            'people': Counter()
-        }
+        combined = self._empty_entities()
         
         for entity_type in combined.keys():
-            combined[entity_type].update(calendar_entities[entity_type])
-            combined[entity_type].update(email_entities[entity_type])
+            for entities in entity_sets:
+                combined[entity_type].update(entities[entity_type])
         
         return combined
     
-    def _extract_top_items(self, entities: Dict, calendar_events: List[Dict], 
-                          sent_emails: List[Dict]) -> List[Dict]:
+    def _extract_top_items(self, entities: Dict, context_index: ContextIndex,
+                           scoring_matrix: ScoringMatrix, policy: ScoringPolicy) -> List[Dict]:
         """Extract top items with context for email generation"""
         top_items = []
         
-        # Get top organizations (customers)
-        top_orgs = entities['organizations'].most_common(10)
+        # Get top organizations (customers), scored in one pass over the document matrix
+        top_orgs = scoring_matrix.rank(policy, limit=10)
         
-        for org, count in top_orgs:
+        for org, score in top_orgs:
             # Find context from calendar and emails
-            context = self._find_context(org, calendar_events, sent_emails)
+            context = context_index.find_context(org)
             
             if context:
                 top_items.append({
                     'name': org,
                     'type': 'customer',
-                    'frequency': count,
+                    'frequency': entities['organizations'][org],
+                    'score': round(score, 3),
                     'context': context
                 })
         
-        # Sort by frequency and return top N
-        top_items.sort(key=lambda x: x['frequency'], reverse=True)
+        # Sort by score and return top N
+        top_items.sort(key=lambda x: x['score'], reverse=True)
         return top_items[:7]
+
+
+class _AnalysisRun:
+    """
+    Per-call state for DataAnalyzer.analyze_data.
     
-    def _find_context(self, entity: str, calendar_events: List[Dict], 
-                     sent_emails: List[Dict]) -> List[str]:
-        """Find context snippets mentioning the entity"""
-        context = []
-        entity_lower = entity.lower()
-        
-        # Search calendar events
-        for event in calendar_events[:50]:  # Limit to recent events
-            subject = event.get('subject', '')
-            if entity_lower in subject.lower():
-                context.append(f"Meeting: {subject}")
-        
-        # Search emails
-        for email in sent_emails[:50]:  # Limit to recent emails
-            subject = email.get('subject', '')
-            preview = email.get('bodyPreview', '')
-            
-            if entity_lower in subject.lower() or entity_lower in preview.lower():
-                # Extract relevant sentence
-                sentences = preview.split('.')
-                for sentence in sentences:
-                    if entity_lower in sentence.lower():
-                        context.append(sentence.strip())
-                        break
+    Documents are compacted as they arrive and queued for NLP in batches. With
+    the daily aggregate store enabled, a document already recorded for its day
+    is held back instead: if the day's fingerprint still matches at the end,
+    the stored aggregates are used and those documents never reach NLP. The
+    first unseen document of a day marks the day as changed and releases
+    everything held back for it into the queue.
+    
+    In bounded-memory mode, held-back documents and context sentences live in
+    a SpillStore, and the per-day aggregates are merged into it every
+    Config.SPILL_EVERY_DOCS documents.
+    """
+    
+    def __init__(self, analyzer: DataAnalyzer, mode: str, timeline: Timeline):
+        self.analyzer = analyzer
+        self.mode = mode
+        self.timeline = timeline
+        self.store = analyzer.aggregate_store
+        self.spill = SpillStore(Config.SPILL_DIR) if analyzer.bounded else None
+        self.context_index = ContextIndex(self.spill)
+        self.daily_entities = defaultdict(analyzer._empty_entities)
+        self.daily_rows = defaultdict(list)   # day -> scoring rows, see ScoringMatrix.add_rows
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self.calendar_count = 0
+        self.email_count = 0
+        self.unique_event_digests = set()
         
-        return context[:5]  # Return top 5 context items
-
+        # Queue enough documents to give every worker a full shard in parallel mode
+        if analyzer.workers > 1 and mode != 'gazetteer':
+            self.flush_size = max(analyzer.batch_size, analyzer.chunk_size * analyzer.workers)
+        else:
+            self.flush_size = analyzer.batch_size
+        if self.spill is not None:
+            self.flush_size = min(self.flush_size, Config.MAX_INFLIGHT_DOCS)
+        self.unspilled = 0                    # Documents aggregated since the last spill
+        self.pending = []                     # (kind, compact document) awaiting NLP
+        self.held = defaultdict(list)         # day -> documents that may not need NLP
+        self.changed_days = set()
+        self.reused_days = set()
+        self.days = {}                        # Dated days seen, in first-seen order
+        self.day_digests = defaultdict(list)  # day -> digests of every document seen (incremental only)
+        self.day_refs = defaultdict(list)     # day -> document references for the store
+        self._stored = {}                     # day -> (fingerprint, Counter of digests) or None
+        self._features = {}                   # text digest -> features, shared by all batches
+    
+    def normalize_event(self, event) -> Dict:
+        """Compact a raw event (safe to call from a prefetch thread)"""
+        started = time.perf_counter()
+        compact = self.analyzer._compact_event(event)
+        self.timeline.add('analyze.normalize', time.perf_counter() - started, 1)
+        return compact
+    
+    def normalize_email(self, email) -> Dict:
+        """Compact a raw email (safe to call from a prefetch thread)"""
+        started = time.perf_counter()
+        compact = self.analyzer._compact_email(email)
+        self.timeline.add('analyze.normalize', time.perf_counter() - started, 1)
+        return compact
+    
+    def add_event(self, compact: Dict):
+        self.calendar_count += 1
+        if self.spill is not None:
+            self.spill.add_event_digest(compact['digest'])
+        else:
+            self.unique_event_digests.add(compact['digest'])
+        self.context_index.add_meeting(compact['subject'])
+        self._route('event', compact)
+    
+    def add_email(self, compact: Dict):
+        self.email_count += 1
+        self.context_index.add_email(compact['preview'])
+        self._route('email', compact)
+    
+    def _route(self, kind: str, compact: Dict):
+        day = compact['day']
+        if day is not None:
+            self.days[day] = None
+        if day is not None and self.store is not None:
+            ref = {'type': kind, 'id': compact['id'], 'subject': compact['subject'], 'digest': compact['digest']}
+            if self.spill is not None:
+                self.spill.add_document(day, compact['digest'], ref)
+            else:
+                self.day_digests[day].append(compact['digest'])
+                self.day_refs[day].append(ref)
+        
+        # Undated documents always go through analysis
+        if self.store is not None and day is not None and day not in self.changed_days:
+            stored = self._stored_day(day)
+            if stored is not None and stored[1][compact['digest']] > 0:
+                stored[1][compact['digest']] -= 1
+                self._hold(day, (kind, compact))
+                return
+            self.changed_days.add(day)
+            self.pending.extend(self._release(day))
+        
+        self.pending.append((kind, compact))
+        if len(self.pending) >= self.flush_size:
+            self._flush()
+    
+    def _hold(self, day: str, document: Tuple[str, Dict]):
+        if self.spill is not None:
+            self.spill.hold(day, document)
+        else:
+            self.held[day].append(document)
+    
+    def _release(self, day: str) -> List[Tuple[str, Dict]]:
+        if self.spill is not None:
+            return self.spill.release(day)
+        return self.held.pop(day, [])
+    
+    def _held_days(self) -> List[str]:
+        return self.spill.held_days() if self.spill is not None else list(self.held)
+    
+    def _stored_day(self, day: str):
+        if day not in self._stored:
+            self._stored[day] = self.store.load_index(day)
+        return self._stored[day]
+    
+    def _analyze(self, texts: List[str]) -> List[Dict]:
+        """Features for each text, analyzing each distinct text at most once per run"""
+        keys = [hashlib.sha1(text.encode('utf-8')).digest() for text in texts]
+        if self.spill is not None and len(self._features) > Config.MAX_INFLIGHT_DOCS:
+            # Bounded mode only remembers recent batches
+            self._features.clear()
+        todo = {key: text for key, text in zip(keys, texts) if key not in self._features}
+        if todo:
+            with self.timeline.span('analyze.extract.ner', items=len(todo)):
+                analyzed = self.analyzer._analyze_texts(list(todo.values()), self.cache_stats, self.mode)
+            self._features.update(zip(todo, analyzed))
+        return [self._features[key] for key in keys]
+    
+    def _flush(self):
+        events = [compact for kind, compact in self.pending if kind == 'event']
+        emails = [compact for kind, compact in self.pending if kind == 'email']
+        self.pending = []
+        if not events and not emails:
+            return
+        with self.timeline.span('analyze.extract', items=len(events) + len(emails)):
+            self.analyzer._extract_calendar_entities(events, self.daily_entities, self.daily_rows, self._analyze)
+            self.analyzer._extract_email_entities(emails, self.daily_entities, self.daily_rows, self._analyze)
+        self.unspilled += len(events) + len(emails)
+        if self.spill is not None and self.unspilled >= Config.SPILL_EVERY_DOCS:
+            self._spill()
+    
+    def _spill(self):
+        """Merge the in-memory per-day aggregates into the spill store and start over"""
+        with self.timeline.span('analyze.spill', items=self.unspilled):
+            self.context_index.flush()
+            self.spill.spill(self.daily_entities, self.daily_rows)
+        self.daily_entities = defaultdict(self.analyzer._empty_entities)
+        self.daily_rows = defaultdict(list)
+        self.unspilled = 0
+    
+    def _digests(self, day: str) -> List[str]:
+        return self.spill.digests(day) if self.spill is not None else self.day_digests[day]
+    
+    def _refs(self, day: str) -> List[Dict]:
+        return self.spill.refs(day) if self.spill is not None else self.day_refs[day]
+    
+    def unique_event_count(self) -> int:
+        if self.spill is not None:
+            return self.spill.event_digest_count()
+        return len(self.unique_event_digests)
+    
+    def rows(self, day: str) -> List:
+        """Scoring rows of a day (call after finish)"""
+        if self.spill is not None:
+            return self.spill.rows(day)
+        return self.daily_rows[day]
+    
+    def finish(self) -> Dict:
+        """Resolve held-back days, analyze what's left and persist changed days"""
+        for day in self._held_days():
+            documents = self._release(day)
+            fingerprint = self.analyzer._day_fingerprint(self._digests(day), self.mode)
+            if fingerprint == self._stored_day(day)[0]:
+                with self.timeline.span('analyze.store.load', items=len(documents)):
+                    self.daily_entities[day] = self.store.load_aggregates(day)
+                    self.daily_rows[day] = self.store.load_rows(day)
+                self.reused_days.add(day)
+            else:
+                # Documents were removed since the day was stored
+                self.changed_days.add(day)
+                self.pending.extend(documents)
+                if len(self.pending) >= self.flush_size:
+                    self._flush()
+        self._flush()
+        
+        if self.spill is not None:
+            # Every day's aggregates now come from the spill store
+            self._spill()
+            self.daily_entities = {day: self.spill.entities(day) for day in self.spill.days()}
+        
+        if self.store is not None:
+            changed = [day for day in self.days if day not in self.reused_days]
+            # Bounded mode loads and saves one day's scoring rows at a time
+            step = 1 if self.spill is not None else max(len(changed), 1)
+            with self.timeline.span('analyze.store.save', items=len(changed)):
+                for start in range(0, len(changed), step):
+                    self.store.save_many([
+                        (day, self.analyzer._day_fingerprint(self._digests(day), self.mode),
+                         self.daily_entities[day], self._refs(day), self.rows(day))
+                        for day in changed[start:start + step]
+                    ])
+        return self.daily_entities
+    
+    def memory_stats(self) -> Dict:
+        """Whether the run was memory-bounded, and how much it spilled"""
+        if self.spill is None:
+            return {'bounded': False}
+        return {
+            'bounded': True,
+            'max_inflight_docs': Config.MAX_INFLIGHT_DOCS,
+            'spills': self.spill.spills,
+            'spill_bytes': self.spill.size_bytes()
+        }
+    
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
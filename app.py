@@ -1,14 +1,60 @@
+import threading
 from flask import Flask, render_template, request, jsonify
-from outlook_data_source import OutlookDataSource
-from analyzer import DataAnalyzer
+from outlook_data_source import OutlookDataSource, SourceFetchError
+from analyzer import DataAnalyzer, NER_MODES, required_fields
 from email_generator import EmailDraftGenerator
 from config import Config
+from profiling import Timeline, format_stages
 
 app = Flask(__name__)
 app.secret_key = Config.SECRET_KEY
 
-# Initialize unified data source (AppleScript + Graph API fallback)
-data_source = OutlookDataSource()
+# Unified data source (AppleScript + Graph API fallback), created by init_app
+data_source = None
+
+# Process-wide analyzer - the spaCy model is loaded once and shared by all requests
+analyzer = None
+analyzer_error = None
+analyzer_ready = threading.Event()
+# One draft at a time, end to end: spaCy pipelines are not guaranteed to be
+# thread-safe and the analyzer keeps per-run state, and since the analysis
+# consumes the Graph pages as they download, a request waits for the previous
+# one's fetch as well as its NLP
+analyzer_lock = threading.Lock()
+_init_lock = threading.Lock()
+
+def warm_analyzer():
+    """Load the analyzer and its NLP model in the background"""
+    global analyzer, analyzer_error
+    try:
+        print("🧠 Loading NLP model...")
+        analyzer = DataAnalyzer()
+        print("✓ NLP model loaded\n")
+    except Exception as e:
+        analyzer_error = str(e)
+        print(f"❌ Failed to load NLP model: {analyzer_error}")
+    finally:
+        analyzer_ready.set()
+
+def init_app():
+    """
+    Create the data source and start loading the analyzer, once per process.
+
+    Called when the server starts and again (as a no-op) before each request,
+    which covers servers that import the app instead of running this file.
+    Nothing happens at import time: analyzer worker processes are spawned and
+    re-import this module as __mp_main__, and must only load their own model.
+    """
+    global data_source
+    with _init_lock:
+        if data_source is not None:
+            return
+        data_source = OutlookDataSource()
+        threading.Thread(target=warm_analyzer, name='analyzer-warmup', daemon=True).start()
+
+@app.before_request
+def ensure_initialized():
+    init_app()
 
 @app.route('/')
 def index():
@@ -55,56 +101,104 @@ def generate_draft():
         # Get parameters from request
         data = request.get_json() or {}
         days_back = data.get('days_back', Config.DAYS_TO_ANALYZE)
+        mode = data.get('mode', Config.NER_MODE)
+        if mode not in NER_MODES:
+            return jsonify({'error': f"Unknown mode '{mode}' (expected one of: {', '.join(NER_MODES)})"}), 400
+
+        # Don't start fetching until the shared analyzer is usable
+        if not analyzer_ready.wait(timeout=Config.ANALYZER_READY_TIMEOUT):
+            return jsonify({'error': 'NLP model is still loading, please retry shortly'}), 503
+        if analyzer is None:
+            return jsonify({'error': f'NLP model failed to load: {analyzer_error}'}), 503
 
         print(f"\n{'='*60}")
         print(f"GENERATING TOP 5 THINGS EMAIL DRAFT")
         print(f"{'='*60}\n")
 
-        # Fetch calendar events (tries AppleScript first, falls back to Graph API)
-        print(f"📅 Fetching calendar events from past {days_back} days...")
-        calendar_events = data_source.get_calendar_events(days_back=days_back)
-
-        # Fetch sent emails (tries AppleScript first, falls back to Graph API)
-        print(f"📧 Fetching sent emails from past {days_back} days...")
-        sent_emails = data_source.get_sent_emails(days_back=days_back)
-
-        # Analyze data
-        print("🔍 Analyzing data...")
-        analyzer = DataAnalyzer()
-        analysis_results = analyzer.analyze_data(calendar_events, sent_emails)
-        print(f"✓ Identified {len(analysis_results.get('top_items', []))} top items\n")
-
-        # Generate email draft
-        print("✍️  Generating email draft...")
-        user_profile = data_source.get_user_profile()
-        user_info = {
-            'email': user_profile.get('email', 'Unknown'),
-            'name': user_profile.get('displayName', 'User')
-        }
-        generator = EmailDraftGenerator(user_info=user_info)
-        draft = generator.generate_draft(analysis_results)
-        print("✓ Email draft generated successfully!\n")
+        timeline = Timeline()
+        with timeline.span('total'):
+            # Taken before fetching, so a waiting request doesn't hold Graph connections
+            # and prefetch threads it can't use yet
+            with analyzer_lock:
+                # Fetch the profile, calendar events and sent emails concurrently
+                # (tries AppleScript first, falls back to Graph API)
+                print(f"📅 Fetching calendar events and sent emails from past {days_back} days...")
+                with data_source.fetch_all(days_back=days_back, timeline=timeline,
+                                           fields=required_fields(mode)) as fetch:
+                    # Analyze data while pages are still arriving
+                    print(f"🔍 Analyzing data ({mode} mode)...")
+                    analysis_results = analyzer.analyze_data(fetch.calendar_events, fetch.sent_emails,
+                                                             mode=mode, timeline=timeline)
+                    print(f"✓ Identified {len(analysis_results.get('top_items', []))} top items\n")
+                    user_profile = fetch.profile()
+                    source_errors = dict(fetch.errors)
+
+            # Generate email draft
+            print("✍️  Generating email draft...")
+            user_info = {
+                'email': user_profile.get('email', 'Unknown'),
+                'name': user_profile.get('displayName', 'User')
+            }
+            with timeline.span('draft.render'):
+                generator = EmailDraftGenerator(user_info=user_info)
+                draft = generator.generate_draft(analysis_results)
+            print("✓ Email draft generated successfully!\n")
+        stages = timeline.stages()
+        # The Graph client outlives requests, so count only the requests made for this one
+        http_stats = data_source.get_http_stats(timeline)
 
         print(f"{'='*60}")
         print(f"SUMMARY")
         print(f"{'='*60}")
         print(f"Data source: {data_source.get_active_method()}")
-        print(f"Calendar events analyzed: {len(calendar_events)}")
-        print(f"Sent emails analyzed: {len(sent_emails)}")
+        for source, error in source_errors.items():
+            print(f"⚠️  {source}: {error}")
+        print(f"Calendar events analyzed: {analysis_results['calendar_count']} "
+              f"({analysis_results['calendar_unique_count']} unique)")
+        print(f"Sent emails analyzed: {analysis_results['email_count']}")
         print(f"Top items identified: {len(analysis_results.get('top_items', []))}")
+        cache_stats = analysis_results.get('cache_stats', {})
+        if cache_stats.get('enabled'):
+            print(f"NER cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)")
+        incremental_stats = analysis_results.get('incremental_stats', {})
+        if incremental_stats.get('enabled'):
+            print(f"Days analyzed: {incremental_stats['days_analyzed']} "
+                  f"(reused {incremental_stats['days_reused']} from daily store)")
+        if http_stats:
+            print(f"Graph API: {http_stats['requests']} requests in {http_stats['round_trips']} round trips, "
+                  f"{http_stats['retries']} retries "
+                  f"({http_stats['throttled']} throttled)")
+        print("Stage timings:")
+        for line in format_stages(stages):
+            print(f"  {line}")
         print(f"{'='*60}\n")
 
         return jsonify({
             'success': True,
             'draft': draft,
             'analysis': {
-                'calendar_events': len(calendar_events),
-                'sent_emails': len(sent_emails),
+                'calendar_events': analysis_results['calendar_count'],
+                'sent_emails': analysis_results['email_count'],
                 'top_items_count': len(analysis_results.get('top_items', [])),
-                'data_source': data_source.get_active_method()
+                'data_source': data_source.get_active_method(),
+                'mode': analysis_results['mode'],
+                'cache_stats': analysis_results.get('cache_stats', {}),
+                'incremental_stats': analysis_results.get('incremental_stats', {}),
+                'memory_stats': analysis_results.get('memory_stats', {}),
+                'http_stats': http_stats,
+                'source_errors': source_errors,
+                'sync_stats': data_source.get_sync_stats(),
+                'payload_stats': data_source.get_payload_stats(),
+                'graph_cache_stats': data_source.get_graph_cache_stats(),
+                'stages': stages
             }
         })
 
+    except SourceFetchError as e:
+        print(f"\n❌ Error fetching data: {str(e)}")
+        return jsonify({'error': 'Failed to fetch Outlook data', 'source_errors': e.errors}), 502
+
     except Exception as e:
         print(f"\n❌ Error generating draft: {str(e)}")
         import traceback
@@ -118,9 +212,18 @@ def status():
     return jsonify({
         'configured': True,
         'connection_status': connection_status,
-        'recommended_method': connection_status.get('recommended_method')
+        'recommended_method': connection_status.get('recommended_method'),
+        'analyzer': {
+            'ready': analyzer is not None,
+            'loading': not analyzer_ready.is_set(),
+            'model': Config.NLP_MODEL,
+            'mode': Config.NER_MODE,
+            'modes': list(NER_MODES),
+            'error': analyzer_error
+        }
     })
 
 if __name__ == '__main__':
+    init_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+
+Runs each stage of the pipeline - the AppleScript result parsers, the local
+profile reader, the Graph client against a local mock Graph server, the
+analyzer over every source shape and draft rendering - over synthetic
+mailboxes of the given sizes, and reports throughput, run latency
+percentiles and peak traced memory per stage.
+
+Results can be saved as a baseline and later runs compared against it; the
+exit status is 1 when any stage's throughput drops, or its peak memory grows,
+by more than the threshold.
+
+Usage:
+    python3 benchmark.py --sizes 100 1000 --save-baseline benchmark_baseline.json
+    python3 benchmark.py --sizes 100 1000 --baseline benchmark_baseline.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import requests
+from datetime import datetime
+from typing import Callable, Dict, List
+from analyzer import DataAnalyzer, NER_MODES
+from email_generator import EmailDraftGenerator
+from graph_client import GraphClient
+from graph_transport import OFFLINE_TOKEN, mount_transport
+from mock_graph import MockGraph, start_mock_server
+from outlook_applescript import OutlookAppleScriptReader
+from outlook_local import OutlookLocalReader
+from synthetic_mailbox import SyntheticMailbox
+from config import Config
+
+STAGES = (
+    'parse.applescript.events',
+    'parse.applescript.emails',
+    'read.local.events',
+    'read.local.emails',
+    'fetch.graph',
+    'analyze.graph',
+    'analyze.applescript',
+    'analyze.local',
+    'draft.render',
+)
+
+# Memory growth below this is noise (allocator and interning effects), not a regression
+MEMORY_NOISE_KB = 256
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Linearly interpolated percentile of a list of values"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(run: Callable, items: int, repeat: int) -> Dict:
+    """
+    Time a stage and measure its peak memory
+
+    The stage runs once to warm up, `repeat` times for timing and once more
+    under tracemalloc (which slows it down, so that run isn't timed).
+
+    Returns:
+        Throughput (items per second at the median run), run latency
+        percentiles in milliseconds and peak traced memory in KB
+    """
+    run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = percentile(timings, 0.5)
+    return {
+        'items': items,
+        'throughput': round(items / median, 1) if median else 0.0,
+        'p50_ms': round(median * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1)
+    }
+
+
+def build_stages(mailbox: SyntheticMailbox, workdir: str, analyzer: DataAnalyzer, graph_url: str) -> Dict[str, tuple]:
+    """
+    Stage name -> (run, items) for one mailbox
+
+    Inputs are rendered up front so each stage times only its own work.
+
+    Args:
+        graph_url: Mock Graph server serving the mailbox, for the fetch.graph stage
+    """
+    documents = len(mailbox)
+    event_output = mailbox.applescript_event_output()
+    email_output = mailbox.applescript_email_output()
+    applescript = OutlookAppleScriptReader()
+
+    local = OutlookLocalReader(db_path=mailbox.write_local_profile(workdir))
+    days_back = mailbox.days + 1
+
+    shaped = {shape: mailbox.shaped(shape) for shape in ('graph', 'applescript', 'local')}
+    drafts = EmailDraftGenerator({'email': 'me@example.com'})
+    analysis = analyzer.analyze_data(*shaped['graph'])
+
+    def render():
+        drafts.format_as_html(drafts.generate_draft(analysis))
+
+    session = requests.Session()
+    mount_transport(session, 'mock', graph_url, pool_maxsize=Config.GRAPH_POOL_SIZE, max_retries=0)
+
+    def fetch_graph():
+        # Full downloads every run: delta sync would make every run after the first trivial
+        client = GraphClient(OFFLINE_TOKEN, session=session, use_delta=False, use_cache=False)
+        for _ in client.iter_calendar_events(days_back):
+            pass
+        for _ in client.iter_sent_emails(days_back):
+            pass
+
+    return {
+        'parse.applescript.events': (lambda: applescript._parse_event_results(event_output), len(mailbox.events)),
+        'parse.applescript.emails': (lambda: applescript._parse_email_results(email_output), len(mailbox.emails)),
+        'read.local.events': (lambda: local.get_calendar_events(days_back), len(mailbox.events)),
+        'read.local.emails': (lambda: local.get_sent_emails(days_back), len(mailbox.emails)),
+        'fetch.graph': (fetch_graph, documents),
+        'analyze.graph': (lambda: analyzer.analyze_data(*shaped['graph']), documents),
+        'analyze.applescript': (lambda: analyzer.analyze_data(*shaped['applescript']), documents),
+        'analyze.local': (lambda: analyzer.analyze_data(*shaped['local']), documents),
+        'draft.render': (render, 1),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Descriptions of every stage that regressed against the baseline beyond the threshold"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if reference['throughput'] and result['throughput'] < reference['throughput'] * (1 - threshold):
+            change = result['throughput'] / reference['throughput'] - 1
+            regressions.append(f"{key}: throughput {result['throughput']}/s vs {reference['throughput']}/s ({change:+.0%})")
+        grown = result['peak_kb'] - reference['peak_kb']
+        if grown > MEMORY_NOISE_KB and result['peak_kb'] > reference['peak_kb'] * (1 + threshold):
+            regressions.append(f"{key}: peak memory {result['peak_kb']} KB vs {reference['peak_kb']} KB")
+    return regressions
+
+
+def main(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic mailboxes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000],
+                        help="Mailbox sizes in documents, half events and half emails (default: %(default)s)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help="Stages to run (default: all)")
+    parser.add_argument('--seed', type=int, default=42, help="Mailbox random seed (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per stage (default: %(default)s)")
+    parser.add_argument('--mode', choices=NER_MODES, default=Config.NER_MODE,
+                        help="Entity recognition mode (default: $NER_MODE or %(default)s)")
+    parser.add_argument('--graph-latency-ms', type=float, default=0,
+                        help="Latency the mock Graph server adds per round trip in fetch.graph (default: none)")
+    parser.add_argument('--baseline', help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', help="Write the results to this file as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed throughput drop / memory growth as a fraction (default: %(default)s)")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"🔍 Loading analyzer ({args.mode} mode)...")
+    analyzer = DataAnalyzer(use_cache=False, incremental=False, mode=args.mode)
+
+    results = {}
+    try:
+        for size in args.sizes:
+            print(f"\n📊 Mailbox of {size} documents (seed {args.seed})")
+            mailbox = SyntheticMailbox(size // 2, size - size // 2, seed=args.seed)
+            graph = start_mock_server(MockGraph(*mailbox.shaped('graph'), latency=args.graph_latency_ms / 1000))
+            try:
+                with tempfile.TemporaryDirectory(prefix='t5t-benchmark-') as workdir:
+                    stages = build_stages(mailbox, workdir, analyzer, graph.url)
+                    print(f"   {'stage':<26} {'items':>7} {'items/s':>11} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>9}")
+                    for name in args.stages:
+                        run, items = stages[name]
+                        result = measure(run, items, args.repeat)
+                        results[f'{name}@{size}'] = result
+                        print(f"   {name:<26} {items:>7} {result['throughput']:>11} {result['p50_ms']:>10.2f} "
+                              f"{result['p95_ms']:>10.2f} {result['peak_kb'] / 1024:>9.2f}")
+            finally:
+                graph.shutdown()
+                graph.server_close()
+    finally:
+        analyzer.close()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'mode': args.mode,
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline saved to: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('mode') != args.mode:
+            print(f"⚠️  Baseline was recorded in {baseline.get('mode')} mode, this run used {args.mode} mode")
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        compared = sum(key in baseline.get('results', {}) for key in results)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} ({compared} stages compared against {args.baseline})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+NER Mode Benchmark
+
+Runs the full, hybrid and gazetteer entity recognition modes over the same
+mailbox and reports how long each takes and how closely the faster modes
+agree with the full spaCy model.
+
+Uses a synthetic mailbox (see synthetic_mailbox.py) unless --input points at
+a JSON file of the form {"calendar_events": [...], "sent_emails": [...]}
+(Graph API shapes).
+"""
+
+import sys
+import json
+import time
+import argparse
+from analyzer import DataAnalyzer, NER_MODES
+from gazetteer import Gazetteer, load_gazetteer_file
+from synthetic_mailbox import SyntheticMailbox, CUSTOMERS, PEOPLE
+from config import Config
+
+def load_input(path: str):
+    """Load a mailbox captured as JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('calendar_events', []), data.get('sent_emails', [])
+
+
+def document_entities(features: dict) -> set:
+    """Case-insensitive (label, name) pairs recognized in one document"""
+    return (
+        {('ORG', name.lower()) for name in features['organizations']} |
+        {('PERSON', name.lower()) for name in features['people']}
+    )
+
+
+def agreement(reference: list, candidate: list) -> dict:
+    """Micro-averaged precision/recall/F1 of per-document entities against the reference"""
+    matched = found = expected = 0
+    for reference_features, candidate_features in zip(reference, candidate):
+        reference_entities = document_entities(reference_features)
+        candidate_entities = document_entities(candidate_features)
+        matched += len(reference_entities & candidate_entities)
+        found += len(candidate_entities)
+        expected += len(reference_entities)
+
+    precision = matched / found if found else 1.0
+    recall = matched / expected if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': round(precision, 3), 'recall': round(recall, 3), 'f1': round(f1, 3)}
+
+
+def benchmark_mode(mode: str, gazetteer: Gazetteer, calendar_events: list, sent_emails: list,
+                   repeat: int) -> dict:
+    """Time one mode end to end and collect its per-document features"""
+    started = time.perf_counter()
+    analyzer = DataAnalyzer(use_cache=False, incremental=False, mode=mode)
+    analyzer.gazetteer = gazetteer
+    load_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = analyzer.analyze_data(calendar_events, sent_emails)
+        timings.append(time.perf_counter() - started)
+
+    texts = [analyzer._compact_event(event)['text'] for event in calendar_events]
+    texts += [analyzer._compact_email(email)['text'] for email in sent_emails]
+    features = analyzer._extract_features_batch(texts, mode)
+    analyzer.close()
+
+    documents = len(calendar_events) + len(sent_emails)
+    best = min(timings)
+    return {
+        'mode': mode,
+        'load_seconds': round(load_seconds, 3),
+        'analyze_seconds': round(best, 3),
+        'documents_per_second': round(documents / best, 1),
+        'top_organizations': [name for name, _ in results['entities']['organizations'].most_common(10)],
+        'features': features
+    }
+
+
+def main(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compare the speed and agreement of the NER modes")
+    parser.add_argument('--input', help="JSON mailbox to analyze instead of a generated sample")
+    parser.add_argument('--events', type=int, default=500, help="Sample calendar events (default: %(default)s)")
+    parser.add_argument('--emails', type=int, default=1000, help="Sample sent emails (default: %(default)s)")
+    parser.add_argument('--gazetteer', default=Config.GAZETTEER_FILE,
+                        help="Gazetteer file (default: $GAZETTEER_FILE, or the sample customer list)")
+    parser.add_argument('--modes', nargs='+', choices=NER_MODES, default=list(NER_MODES),
+                        help="Modes to run; agreement is measured against the first (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per mode, best is kept (default: %(default)s)")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        calendar_events, sent_emails = load_input(args.input)
+    else:
+        calendar_events, sent_emails = SyntheticMailbox(args.events, args.emails).shaped('graph')
+
+    if args.gazetteer:
+        gazetteer = load_gazetteer_file(args.gazetteer)
+    else:
+        gazetteer = Gazetteer({**{name: 'ORG' for name, _ in CUSTOMERS},
+                               **{name: 'PERSON' for name in PEOPLE}})
+
+    print(f"📊 {len(calendar_events)} calendar events, {len(sent_emails)} sent emails, "
+          f"{len(gazetteer)} gazetteer entries\n")
+
+    runs = []
+    for mode in args.modes:
+        print(f"⏱️  Running {mode} mode...")
+        runs.append(benchmark_mode(mode, gazetteer, calendar_events, sent_emails, args.repeat))
+
+    reference = runs[0]
+    report = []
+    print(f"\n{'mode':<10} {'load s':>8} {'analyze s':>10} {'docs/s':>10} "
+          f"{'precision':>10} {'recall':>8} {'f1':>6} {'top-10':>7}")
+    for run in runs:
+        scores = agreement(reference['features'], run['features'])
+        overlap = len(set(reference['top_organizations']) & set(run['top_organizations']))
+        top_overlap = overlap / len(reference['top_organizations']) if reference['top_organizations'] else 1.0
+        print(f"{run['mode']:<10} {run['load_seconds']:>8.3f} {run['analyze_seconds']:>10.3f} "
+              f"{run['documents_per_second']:>10} {scores['precision']:>10.3f} {scores['recall']:>8.3f} "
+              f"{scores['f1']:>6.3f} {top_overlap:>7.0%}")
+        report.append({
+            **{key: value for key, value in run.items() if key != 'features'},
+            'agreement': {**scores, 'top_10_overlap': round(top_overlap, 3), 'reference': reference['mode']}
+        })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,7 +28,65 @@ class Config:
     # Graph API Endpoints
     GRAPH_API_ENDPOINT = 'https://graph.microsoft.com/v1.0'
 
+    # Graph API HTTP Configuration
+    GRAPH_CONNECT_TIMEOUT = float(os.getenv('GRAPH_CONNECT_TIMEOUT', '5'))  # Seconds to establish a connection
+    GRAPH_READ_TIMEOUT = float(os.getenv('GRAPH_READ_TIMEOUT', '60'))  # Seconds to wait for response data
+    GRAPH_MAX_RETRIES = int(os.getenv('GRAPH_MAX_RETRIES', '5'))  # Retries per request on throttling, 5xx and connection errors
+    GRAPH_BACKOFF_BASE = float(os.getenv('GRAPH_BACKOFF_BASE', '1'))  # First backoff is up to this many seconds, doubling per retry
+    GRAPH_BACKOFF_MAX = float(os.getenv('GRAPH_BACKOFF_MAX', '60'))  # Cap on one backoff wait (Retry-After is always honored)
+    GRAPH_POOL_SIZE = int(os.getenv('GRAPH_POOL_SIZE', '10'))  # Keep-alive connections kept per host
+    GRAPH_PARALLEL_SLICES = int(os.getenv('GRAPH_PARALLEL_SLICES', '4'))  # Max date sub-ranges paginated in parallel per source; 1 disables
+    GRAPH_SLICE_ITEMS = int(os.getenv('GRAPH_SLICE_ITEMS', '1000'))  # Items per sub-range when sizing slices from the $count probe
+    GRAPH_STREAM_CHUNK_KB = int(os.getenv('GRAPH_STREAM_CHUNK_KB', '64'))  # Response bytes read at a time while decoding pages item by item
+    GRAPH_PAYLOAD_SAMPLE = int(os.getenv('GRAPH_PAYLOAD_SAMPLE', '0'))  # Unprojected items sampled per source to estimate payload saved (0 = off; costs 2 extra requests per source)
+    GRAPH_BATCH_ENABLED = os.getenv('GRAPH_BATCH_ENABLED', 'true').lower() == 'true'  # Combine concurrent requests into $batch calls
+    GRAPH_BATCH_LINGER_MS = int(os.getenv('GRAPH_BATCH_LINGER_MS', '10'))  # How long a request waits for others to batch with
+    GRAPH_DELTA_ENABLED = os.getenv('GRAPH_DELTA_ENABLED', 'false').lower() == 'true'  # Download only changes since the last run (replaces sliced pagination)
+    GRAPH_DELTA_FILE = os.getenv('GRAPH_DELTA_FILE', os.path.join(os.path.dirname(TOKEN_CACHE_FILE) or '.', 'graph_delta.sqlite'))  # Delta links and local item store, next to the token cache
+    GRAPH_CACHE_ENABLED = os.getenv('GRAPH_CACHE_ENABLED', 'true').lower() == 'true'  # Cache GET responses on disk and revalidate them with ETags
+    GRAPH_CACHE_FILE = os.getenv('GRAPH_CACHE_FILE', os.path.join(os.path.dirname(TOKEN_CACHE_FILE) or '.', 'graph_cache.sqlite'))  # Response cache, next to the token cache
+    GRAPH_CACHE_MAX_MB = int(os.getenv('GRAPH_CACHE_MAX_MB', '64'))  # Least recently used responses evicted past this
+    GRAPH_CACHE_PROFILE_TTL = float(os.getenv('GRAPH_CACHE_PROFILE_TTL', '3600'))  # Seconds a cached /me profile is served without asking Graph
+    GRAPH_CACHE_PAGE_TTL = float(os.getenv('GRAPH_CACHE_PAGE_TTL', '300'))  # Seconds cached calendar and mail pages are served without asking Graph
+    GRAPH_CACHE_METADATA_TTL = float(os.getenv('GRAPH_CACHE_METADATA_TTL', '3600'))  # Seconds other lookups (photo, mailbox settings) are served without asking Graph
+    GRAPH_TRANSPORT = os.getenv('GRAPH_TRANSPORT', 'live')  # live, record (to fixtures), replay (from fixtures) or mock (local mock server)
+    GRAPH_FIXTURES_DIR = os.getenv('GRAPH_FIXTURES_DIR', './graph_fixtures')  # Where record mode writes and replay mode reads Graph responses
+    GRAPH_MOCK_URL = os.getenv('GRAPH_MOCK_URL', '')  # Mock Graph server for mock mode, e.g. http://127.0.0.1:8765/v1.0 (default: start one in-process)
+    GRAPH_DELTA_AHEAD_DAYS = int(os.getenv('GRAPH_DELTA_AHEAD_DAYS', '30'))  # How far into the future the synced calendar window reaches
+
     # Analysis Configuration
     DAYS_TO_ANALYZE = 30  # Look back 30 days
     TOP_N_ITEMS = 7  # Generate top 5-7 items
 
+    # NLP Configuration
+    NLP_MODEL = os.getenv('NLP_MODEL', 'en_core_web_sm')
+    NLP_BATCH_SIZE = int(os.getenv('NLP_BATCH_SIZE', '256'))  # Texts per nlp.pipe batch
+    TECH_KEYWORDS_FILE = os.getenv('TECH_KEYWORDS_FILE')  # Optional extra keywords, one per line
+    NER_MODE = os.getenv('NER_MODE', 'full')  # full (spaCy model), hybrid (gazetteer first) or gazetteer (no model)
+    GAZETTEER_FILE = os.getenv('GAZETTEER_FILE')  # Known customers/people, one per line ('Name' or 'Name|PERSON')
+    MAX_DOC_CHARS = int(os.getenv('MAX_DOC_CHARS', '4000'))  # Per-document text budget after HTML/boilerplate stripping (0 = no limit)
+    MAX_DOC_TOKENS = int(os.getenv('MAX_DOC_TOKENS', '0'))  # Optional per-document word budget (0 = no limit)
+    NER_CACHE_ENABLED = os.getenv('NER_CACHE_ENABLED', 'true').lower() == 'true'
+    NER_CACHE_FILE = os.getenv('NER_CACHE_FILE', './data/ner_cache.sqlite')
+    NER_CACHE_MAX_MB = int(os.getenv('NER_CACHE_MAX_MB', '64'))  # Least recently used entries evicted past this
+    INCREMENTAL_ANALYSIS = os.getenv('INCREMENTAL_ANALYSIS', 'true').lower() == 'true'
+    AGGREGATE_STORE_FILE = os.getenv('AGGREGATE_STORE_FILE', './data/daily_aggregates.sqlite')
+    AGGREGATE_RETENTION_DAYS = int(os.getenv('AGGREGATE_RETENTION_DAYS', '400'))
+    ANALYZER_WORKERS = int(os.getenv('ANALYZER_WORKERS', '0'))  # >1 enables multi-process NLP
+    ANALYZER_CHUNK_SIZE = int(os.getenv('ANALYZER_CHUNK_SIZE', '500'))  # Texts per worker task
+    STREAM_PREFETCH_ITEMS = int(os.getenv('STREAM_PREFETCH_ITEMS', '2000'))  # Documents buffered ahead of the analyzer
+    ANALYZER_READY_TIMEOUT = int(os.getenv('ANALYZER_READY_TIMEOUT', '30'))  # Seconds /api/generate waits for the model
+    BOUNDED_MEMORY = os.getenv('BOUNDED_MEMORY', 'false').lower() == 'true'  # Cap in-flight documents and spill aggregates to disk
+    MAX_INFLIGHT_DOCS = int(os.getenv('MAX_INFLIGHT_DOCS', '500'))  # Bounded mode: documents buffered per source and queued for NLP
+    SPILL_EVERY_DOCS = int(os.getenv('SPILL_EVERY_DOCS', '2000'))  # Bounded mode: documents aggregated in memory between spills
+    SPILL_DIR = os.getenv('SPILL_DIR', './data')  # Bounded mode: where the temporary spill database lives
+
+    # Scoring Configuration
+    # Weight of an organization mention per source, recency half-life (0 = no decay),
+    # and exponents for attendee count / meeting hours (0 = ignored)
+    SCORE_WEIGHT_EVENT = float(os.getenv('SCORE_WEIGHT_EVENT', '1'))
+    SCORE_WEIGHT_EMAIL = float(os.getenv('SCORE_WEIGHT_EMAIL', '2'))
+    SCORE_WEIGHT_RECIPIENT = float(os.getenv('SCORE_WEIGHT_RECIPIENT', '1'))
+    SCORE_HALF_LIFE_DAYS = float(os.getenv('SCORE_HALF_LIFE_DAYS', '0'))
+    SCORE_ATTENDEE_EXPONENT = float(os.getenv('SCORE_ATTENDEE_EXPONENT', '0'))
+    SCORE_DURATION_EXPONENT = float(os.getenv('SCORE_DURATION_EXPONENT', '0'))
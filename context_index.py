@@ -0,0 +1,123 @@
+import re
+from array import array
+from collections import defaultdict
+from typing import List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Document kinds, in the order their snippets are returned
+MEETING = 0
+EMAIL = 1
+
+# Bit layout of a packed posting
+_DOC_SHIFT = 20
+_KIND_SHIFT = 52
+_SENTENCE_MASK = (1 << _DOC_SHIFT) - 1
+_DOC_MASK = (1 << (_KIND_SHIFT - _DOC_SHIFT)) - 1
+
+
+def _pack(kind: int, doc_number: int, sentence_number: int) -> int:
+    return (kind << _KIND_SHIFT) | (doc_number << _DOC_SHIFT) | sentence_number
+
+
+def _unpack(posting: int) -> Tuple[int, int, int]:
+    return posting >> _KIND_SHIFT, (posting >> _DOC_SHIFT) & _DOC_MASK, posting & _SENTENCE_MASK
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercased text into alphanumeric tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class ContextIndex:
+    """
+    Inverted index from tokens to the meeting subjects and email sentences that
+    contain them. Built once during the extraction pass so that context lookup
+    for an entity is a postings probe instead of a rescan of every document.
+
+    Postings are packed into one 64-bit integer each (kind, document number,
+    sentence number, in that bit order, so they sort like the tuples would).
+    With a SpillStore, sentences are written to it as they're indexed and
+    postings whenever flush() is called.
+    """
+
+    def __init__(self, spill=None):
+        """
+        Args:
+            spill: Optional SpillStore that keeps the sentences and postings on disk
+        """
+        # token -> packed (kind, doc_number, sentence_number) postings, in document order
+        self.postings = defaultdict(lambda: array('q'))
+        # (kind, doc_number) -> sentences, unless they're spilled
+        self.sentences = {}
+        self.spill = spill
+        self._doc_counts = [0, 0]
+
+    def _add(self, kind: int, sentences: List[str]):
+        doc_number = self._doc_counts[kind]
+        self._doc_counts[kind] += 1
+
+        for sentence_number, sentence in enumerate(sentences):
+            posting = _pack(kind, doc_number, sentence_number)
+            for token in set(tokenize(sentence)):
+                self.postings[token].append(posting)
+        if self.spill is not None:
+            self.spill.put_sentences(kind, doc_number, sentences)
+        else:
+            self.sentences[(kind, doc_number)] = sentences
+
+    def flush(self):
+        """Move the postings collected so far to the spill store (no-op without one)"""
+        if self.spill is not None and self.postings:
+            self.spill.add_postings(self.postings)
+            self.postings = defaultdict(lambda: array('q'))
+
+    def _candidates(self, tokens) -> Sequence[int]:
+        """Postings of the rarest of the tokens"""
+        if self.spill is None:
+            return min((self.postings.get(token, ()) for token in tokens), key=len)
+        self.flush()
+        return self.spill.postings(min(tokens, key=self.spill.posting_count))
+
+    def _sentences(self, kind: int, doc_number: int) -> List[str]:
+        if self.spill is not None:
+            return self.spill.get_sentences(kind, doc_number)
+        return self.sentences[(kind, doc_number)]
+
+    def add_meeting(self, subject: str):
+        """Index a calendar event by its subject"""
+        self._add(MEETING, [subject])
+
+    def add_email(self, body_preview: str):
+        """Index a sent email by the sentences of its body preview"""
+        self._add(EMAIL, body_preview.split('.'))
+
+    def find_context(self, entity: str, limit: int = 5) -> List[str]:
+        """
+        Find context snippets mentioning the entity: meeting subjects first, then
+        the first matching sentence of each email, both in document order.
+        """
+        entity_lower = entity.lower()
+        tokens = set(tokenize(entity_lower))
+        if not tokens:
+            return []
+
+        # Probe the rarest token, then confirm the full entity text is present
+        candidates = self._candidates(tokens)
+
+        context = []
+        seen_docs = set()
+        for posting in sorted(candidates):
+            kind, doc_number, sentence_number = _unpack(posting)
+            if (kind, doc_number) in seen_docs:
+                continue
+            sentence = self._sentences(kind, doc_number)[sentence_number]
+            if entity_lower not in sentence.lower():
+                continue
+
+            seen_docs.add((kind, doc_number))
+            context.append(f"Meeting: {sentence}" if kind == MEETING else sentence.strip())
+            if len(context) >= limit:
+                break
+
+        return context
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+class DeltaStore:
+    """
+    Local copy of the Graph collections fetched with delta queries (calendar
+    view, sent items), together with the @odata.deltaLink each one was last
+    synced to. A run only downloads what was added, changed or removed since
+    the previous one, applies it here and reads the window it needs back
+    from the store.
+
+    Items are keyed by collection and id. Each keeps a start and end time
+    (UTC, 'YYYY-MM-DDTHH:MM:SS'; an email's end is its sent time) so the
+    requested window can be selected without decoding every item.
+    """
+
+    def __init__(self, store_file: str):
+        """
+        Args:
+            store_file: Path to the SQLite database backing the store
+        """
+        self.store_file = store_file
+
+        directory = os.path.dirname(store_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS links (
+                    collection TEXT PRIMARY KEY,
+                    delta_link TEXT NOT NULL,
+                    window_start TEXT NOT NULL,
+                    window_end TEXT,
+                    updated REAL NOT NULL,
+                    fields TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            # Stores created before items were projected to the requested fields
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(links)")}
+            if 'fields' not in columns:
+                conn.execute("ALTER TABLE links ADD COLUMN fields TEXT NOT NULL DEFAULT ''")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    collection TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    PRIMARY KEY (collection, id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS items_start ON items (collection, start)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.store_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def link(self, collection: str) -> Optional[Dict]:
+        """
+        The delta link a collection was last synced to, the window it covers
+        and the item fields stored (None when items were stored whole).
+
+        Returns:
+            {'delta_link', 'window_start', 'window_end', 'fields'}, or None if the collection was never synced
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT delta_link, window_start, window_end, fields FROM links WHERE collection = ?", (collection,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'delta_link': row[0], 'window_start': row[1], 'window_end': row[2],
+                'fields': row[3].split(',') if row[3] else None}
+
+    def save_link(self, collection: str, delta_link: str, window_start: str, window_end: str = None,
+                  fields: Sequence[str] = ()):
+        """Record the delta link to continue from next time"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO links (collection, delta_link, window_start, window_end, updated, fields) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (collection, delta_link, window_start, window_end, time.time(), ','.join(fields))
+            )
+
+    def reset(self, collection: str):
+        """Forget a collection's items and delta link, ahead of a full download"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM items WHERE collection = ?", (collection,))
+            conn.execute("DELETE FROM links WHERE collection = ?", (collection,))
+
+    def apply(self, collection: str, changes: List[tuple], removals: List[str]):
+        """
+        Apply one page of a delta response
+
+        Args:
+            changes: Added or changed items as (id, start, end, item dict)
+            removals: Ids of removed items
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (collection, id, start, end, item) VALUES (?, ?, ?, ?, ?)",
+                ((collection, item_id, start, end, json.dumps(item)) for item_id, start, end, item in changes)
+            )
+            conn.executemany(
+                "DELETE FROM items WHERE collection = ? AND id = ?",
+                ((collection, item_id) for item_id in removals)
+            )
+
+    def prune(self, collection: str, before: str) -> int:
+        """Drop items that ended before a time; returns how many were dropped"""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM items WHERE collection = ? AND end < ?", (collection, before)
+            ).rowcount
+
+    def items(self, collection: str, start: str, end: str, newest_first: bool = False) -> Iterator[Dict]:
+        """Stored items overlapping [start, end), ordered by start time"""
+        order = 'DESC' if newest_first else 'ASC'
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT item FROM items WHERE collection = ? AND start < ? AND end >= ? ORDER BY start {order}, id",
+                (collection, end, start)
+            )
+            for (item,) in cursor:
+                yield json.loads(item)
+
+    def count(self, collection: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM items WHERE collection = ?", (collection,)).fetchone()[0]
+
+    def clear(self):
+        """Forget every collection"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM items")
+            conn.execute("DELETE FROM links")
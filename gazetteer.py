@@ -0,0 +1,64 @@
+import hashlib
+from typing import Dict, List, Tuple
+from keyword_matcher import KeywordMatcher
+
+# Label given to gazetteer entries that don't name one
+DEFAULT_LABEL = 'ORG'
+
+
+class Gazetteer:
+    """
+    Rule-based entity recognizer over a list of known names (customers,
+    partners, people). Matching is whole-word and case-insensitive, and every
+    match is reported under the name as written in the list, so spelling
+    variants in the text are counted together. No statistical model is needed.
+    """
+
+    def __init__(self, entries: Dict[str, str] = None):
+        """
+        Args:
+            entries: Mapping of entity name to spaCy-style label ('ORG', 'PERSON')
+        """
+        # normalized name -> (name as listed, label)
+        self.entries = {}
+        for name, label in (entries or {}).items():
+            name = ' '.join(name.split())
+            if name:
+                self.entries[KeywordMatcher.normalize(name)] = (name, label or DEFAULT_LABEL)
+        self.matcher = KeywordMatcher(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the entries, so results from a different list are never reused"""
+        listing = '\n'.join(f"{label}\t{name}" for name, label in sorted(self.entries.values()))
+        return hashlib.sha256(listing.encode('utf-8')).hexdigest()
+
+    def entities(self, text: str) -> List[Tuple[str, str]]:
+        """Return (label, name) for each non-overlapping known name in the text"""
+        found = []
+        for _, _, keyword in self.matcher.find_spans(text):
+            name, label = self.entries[keyword]
+            found.append((label, name))
+        return found
+
+
+def load_gazetteer_file(path: str) -> Gazetteer:
+    """
+    Load one name per line, optionally followed by '|LABEL' (default ORG),
+    ignoring blank lines and '#' comments. For example:
+
+        Acme Corp
+        Jane Doe|PERSON
+    """
+    entries = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            name, _, label = line.partition('|')
+            entries[name.strip()] = label.strip().upper() or DEFAULT_LABEL
+    return Gazetteer(entries)
@@ -8,11 +8,13 @@ No persistent tokens, no web server - just a simple CLI tool.
 
 import sys
 import os
+import time
+import argparse
 from datetime import datetime
 from pathlib import Path
-from auth import MSALAuth
-from graph_client import GraphClient
-from analyzer import DataAnalyzer
+from outlook_data_source import OutlookDataSource, SourceFetchError
+from analyzer import DataAnalyzer, NER_MODES, required_fields
+from profiling import Timeline, format_stages, peak_rss_kb, start_profiler, write_profile
 from email_generator import EmailDraftGenerator
 from config import Config
 
@@ -55,15 +57,39 @@ def save_draft_to_file(draft, output_dir="./output"):
     
     return str(filepath)
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate a Top 5 Things email draft from Microsoft 365 data")
+    parser.add_argument('--days-back', type=int, default=int(os.getenv('DAYS_BACK', Config.DAYS_TO_ANALYZE)),
+                        help="Days of calendar and sent mail to analyze (default: $DAYS_BACK or %(default)s)")
+    parser.add_argument('--mode', choices=NER_MODES, default=Config.NER_MODE,
+                        help="Entity recognition mode: full (spaCy model), hybrid (gazetteer first, model "
+                             "for the rest) or gazetteer (no model, fastest) (default: %(default)s)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write a cProfile dump (.pstats) and a JSON span timeline to ./output")
+    parser.add_argument('--memory', action='store_true',
+                        help="Report peak traced memory per stage, the largest allocation sites and peak RSS "
+                             "(tracemalloc; slows the run down)")
+    parser.add_argument('--bounded-memory', action='store_true', default=Config.BOUNDED_MEMORY,
+                        help="Cap in-flight documents (MAX_INFLIGHT_DOCS) and spill intermediate aggregates "
+                             "to disk, for long windows of busy mailboxes (default: $BOUNDED_MEMORY)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function"""
+    args = parse_args(argv)
+    timeline = Timeline(trace_memory=args.memory)
+    profiler = start_profiler() if args.profile else None
     try:
         print_banner()
         
         # Get parameters
-        days_back = int(os.getenv('DAYS_BACK', Config.DAYS_TO_ANALYZE))
+        days_back = args.days_back
         
         print(f"📊 Analysis period: Last {days_back} days")
+        print(f"🧠 Entity recognition: {args.mode} mode")
+        if args.bounded_memory:
+            print(f"🗜️  Bounded memory: at most {Config.MAX_INFLIGHT_DOCS} documents in flight per source")
         print(f"🔐 Authentication: Microsoft 365 (one-time device code flow)")
         print(f"📖 Access: Read-only (no emails sent, no calendar changes)\n")
         
@@ -72,58 +98,61 @@ def main():
         print("Authenticating with Microsoft 365...")
         print("This requires one-time approval in your browser.\n")
         
-        auth_handler = MSALAuth()
-        access_token = auth_handler.get_access_token()
-        
-        # Step 2: Get user profile
-        print_section("STEP 2: FETCHING USER PROFILE")
-        graph_client = GraphClient(access_token)
-        user_profile = graph_client.get_user_profile()
-        
-        user_email = user_profile.get('mail') or user_profile.get('userPrincipalName', 'Unknown')
-        user_name = user_profile.get('displayName', 'User')
-        
-        print(f"✓ Authenticated as: {user_name} ({user_email})\n")
-        
-        # Step 3: Fetch calendar events
-        print_section("STEP 3: FETCHING CALENDAR EVENTS")
-        print(f"📅 Retrieving calendar events from the past {days_back} days...")
-        calendar_events = graph_client.get_calendar_events(days_back=days_back)
-        print(f"✓ Found {len(calendar_events)} calendar events\n")
-        
-        # Step 4: Fetch sent emails
-        print_section("STEP 4: FETCHING SENT EMAILS")
-        print(f"📧 Retrieving sent emails from the past {days_back} days...")
-        sent_emails = graph_client.get_sent_emails(days_back=days_back)
-        print(f"✓ Found {len(sent_emails)} sent emails\n")
-        
-        # Step 5: Analyze data
-        print_section("STEP 5: ANALYZING DATA")
-        print("🔍 Analyzing calendar and email data...")
-        print("   - Identifying frequently discussed customers")
-        print("   - Identifying key projects and topics")
-        print("   - Ranking by frequency and relevance...\n")
-        
-        analyzer = DataAnalyzer()
-        analysis_results = analyzer.analyze_data(calendar_events, sent_emails)
-        
+        # The CLI always reads from Microsoft 365 through the Graph API
+        data_source = OutlookDataSource(use_applescript=False)
+        max_items = Config.MAX_INFLIGHT_DOCS if args.bounded_memory else Config.STREAM_PREFETCH_ITEMS
+        
+        # Profile, calendar events and sent emails are fetched concurrently from here on
+        # Only the fields the analyzer reads in this mode are downloaded
+        with data_source.fetch_all(days_back=days_back, timeline=timeline, max_items=max_items,
+                                   fields=required_fields(args.mode)) as fetch:
+            # Step 2: Get user profile
+            print_section("STEP 2: FETCHING USER PROFILE")
+            print(f"📅 Retrieving calendar events from the past {days_back} days...")
+            print(f"📧 Retrieving sent emails from the past {days_back} days...")
+            user_profile = fetch.profile()
+            if 'profile' in fetch.errors:
+                print(f"⚠️  Could not fetch your profile: {fetch.errors['profile']}")
+            
+            user_email = user_profile['email']
+            user_name = user_profile['displayName']
+            
+            print(f"✓ Authenticated as: {user_name} ({user_email})\n")
+            
+            # Step 3: Stream calendar events and sent emails straight into the analyzer
+            print_section("STEP 3: ANALYZING DATA")
+            print("🔍 Analyzing pages as they arrive...")
+            print("   - Identifying frequently discussed customers")
+            print("   - Identifying key projects and topics")
+            print("   - Ranking by frequency and relevance...\n")
+            
+            # Downloads keep running while the model loads
+            with timeline.span('analyzer.load'):
+                analyzer = DataAnalyzer(mode=args.mode, bounded=args.bounded_memory)
+            analysis_results = analyzer.analyze_data(fetch.calendar_events, fetch.sent_emails, timeline=timeline)
+        calendar_count = analysis_results['calendar_count']
+        email_count = analysis_results['email_count']
+        
+        print(f"✓ Found {calendar_count} calendar events")
+        print(f"✓ Found {email_count} sent emails")
         top_items_count = len(analysis_results.get('top_items', []))
         print(f"✓ Identified {top_items_count} top items\n")
         
-        # Step 6: Generate email draft
-        print_section("STEP 6: GENERATING EMAIL DRAFT")
+        # Step 4: Generate email draft
+        print_section("STEP 4: GENERATING EMAIL DRAFT")
         print("✍️  Generating email draft in specified format...\n")
         
         user_info = {
             'email': user_email,
             'name': user_name
         }
-        generator = EmailDraftGenerator(user_info=user_info)
-        draft = generator.generate_draft(analysis_results)
+        with timeline.span('draft.render'):
+            generator = EmailDraftGenerator(user_info=user_info)
+            draft = generator.generate_draft(analysis_results)
         
         print("✓ Email draft generated successfully!\n")
         
-        # Step 7: Display and save draft
+        # Display and save draft
         print_section("YOUR EMAIL DRAFT")
         print(f"\nSubject: {draft['subject']}\n")
         print("=" * 70 + "\n")
@@ -137,10 +166,56 @@ def main():
         # Summary
         print_section("SUMMARY")
         print(f"✓ User: {user_name} ({user_email})")
-        print(f"✓ Calendar events analyzed: {len(calendar_events)}")
-        print(f"✓ Sent emails analyzed: {len(sent_emails)}")
-        print(f"✓ Top items identified: {top_items_count}")
+        print(f"✓ Calendar events analyzed: {calendar_count} "
+              f"({analysis_results['calendar_unique_count']} unique after collapsing recurring meetings)")
+        print(f"✓ Sent emails analyzed: {email_count}")
+        print(f"✓ Top items identified: {top_items_count} ({analysis_results['mode']} mode)")
+        cache_stats = analysis_results.get('cache_stats', {})
+        if cache_stats.get('enabled'):
+            print(f"✓ NER cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['evictions']} evicted, "
+                  f"{cache_stats['size_bytes'] / 1024:.0f} KB on disk)")
+        incremental_stats = analysis_results.get('incremental_stats', {})
+        if incremental_stats.get('enabled'):
+            print(f"✓ Incremental analysis: {incremental_stats['days_analyzed']} new/changed days analyzed, "
+                  f"{incremental_stats['days_reused']} reused from the daily store")
+        memory_stats = analysis_results.get('memory_stats', {})
+        if memory_stats.get('bounded'):
+            print(f"✓ Bounded memory: {memory_stats['spills']} spills, "
+                  f"{memory_stats['spill_bytes'] / 1024:.0f} KB spilled to disk")
+        http_stats = data_source.get_http_stats()
+        print(f"✓ Graph API: {http_stats['requests']} requests in {http_stats['round_trips']} round trips "
+              f"({http_stats['batches']} $batch calls), {http_stats['retries']} retries "
+              f"({http_stats['throttled']} throttled, {http_stats['connection_errors']} connection errors), "
+              f"waited {http_stats['retry_wait_seconds']:.1f}s")
+        graph_cache = data_source.get_graph_cache_stats()
+        if graph_cache:
+            print(f"✓ Graph cache: {graph_cache['hits']} hits, {graph_cache['revalidated']} revalidated / "
+                  f"{graph_cache['misses']} misses ({graph_cache['hit_rate']:.0%} hit rate, "
+                  f"{graph_cache['evictions']} evicted, {graph_cache['size_bytes'] / 1024:.0f} KB on disk)")
+        for source, payload in data_source.get_payload_stats().items():
+            saved = f", ~{payload['saved_bytes'] / 1024:.0f} KB saved by field projection" if 'saved_bytes' in payload else ''
+            print(f"✓ Payload ({source}): {payload['items']} items, {payload['bytes'] / 1024:.0f} KB received{saved}")
+        for source, sync in data_source.get_sync_stats().items():
+            kind = 'full download' if sync['full_sync'] else 'changes since last run'
+            print(f"✓ Delta sync ({source}): {sync['changed']} added/changed, {sync['removed']} removed "
+                  f"({kind}; {sync['stored']} stored locally)")
         print(f"✓ Draft saved to: {output_file}")
+        timeline.add('total', time.perf_counter() - timeline.started)
+        print("\n⏱️  Stage timings:")
+        for line in format_stages(timeline.stages()):
+            print(f"   {line}")
+        if args.memory:
+            print(f"\n🧮 Peak RSS: {peak_rss_kb() / 1024:.1f} MB")
+            for stage, allocations in timeline.memory_snapshots.items():
+                print(f"   Largest allocations still held after {stage}:")
+                for allocation in allocations:
+                    print(f"     {allocation['location']:<32} {allocation['size_kb']:>8} KB  "
+                          f"{allocation['count']} blocks")
+        if profiler is not None:
+            pstats_path, timeline_path = write_profile(profiler, timeline)
+            print(f"\n✓ Profile saved to: {pstats_path}")
+            print(f"✓ Span timeline saved to: {timeline_path}")
         print("\n" + "=" * 70 + "\n")
         
         print("🎉 Done! Your Top 5 Things email draft is ready.\n")
@@ -151,6 +226,12 @@ def main():
     except KeyboardInterrupt:
         print("\n\n⚠️  Operation cancelled by user.\n")
         return 1
+    except SourceFetchError as e:
+        print("\n\n❌ Error: could not fetch your Microsoft 365 data")
+        for source, error in e.errors.items():
+            print(f"   - {source}: {error}")
+        print()
+        return 1
     except Exception as e:
         print(f"\n\n❌ Error: {str(e)}\n")
         import traceback
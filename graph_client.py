@@ -1,93 +1,852 @@
+import json
+import math
+import zlib
+import time
+import random
+import threading
 import requests
-from datetime import datetime, timedelta
+from urllib.parse import quote, urlencode
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from config import Config
+from profiling import Timeline
+from streaming import prefetch, JsonObjectStream
+from delta_store import DeltaStore
+from graph_transport import fixture_key, mount_transport
+from response_cache import ResponseCache, CachedResponse, CachingResponse, account_id
+
+# Throttling and transient server errors; Graph asks clients to retry these
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+# Failures worth retrying that happen before or while a response body is read
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# Graph accepts at most 20 requests in one $batch call
+MAX_BATCH_REQUESTS = 20
+
+# Delta changes written to the local item store per transaction while a page decodes
+DELTA_APPLY_ITEMS = 200
+
+# Minutes the windows in cached page keys are rounded to. Windows are computed from the
+# current time, so a re-run (or a nextLink followed) a few minutes later still finds the
+# pages, while date slices (hours to days apart) keep separate entries.
+CACHE_KEY_RESOLUTION = 60
+
+# Every property the fetchers request when the caller doesn't declare what it needs;
+# also the baseline the payload-saved estimate compares projected fetches against
+FULL_FIELDS = {
+    'calendar': ('subject', 'start', 'end', 'attendees', 'organizer', 'body', 'seriesMasterId', 'type'),
+    'email': ('subject', 'sentDateTime', 'toRecipients', 'ccRecipients', 'body', 'bodyPreview'),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    """
+    The process-wide pooled session. Connections are kept alive and reused
+    across pages, clients and threads instead of a TCP/TLS handshake per page.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled by GraphClient, which honors Retry-After
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=Config.GRAPH_POOL_SIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # Record, replay or mock transports take over the Graph host (GRAPH_TRANSPORT)
+            mount_transport(session, pool_connections=4, pool_maxsize=Config.GRAPH_POOL_SIZE, max_retries=0)
+            _session = session
+        return _session
+
+
+def graph_time(value):
+    """Format a UTC datetime for Graph query parameters"""
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def time_key(value):
+    """UTC 'YYYY-MM-DDTHH:MM:SS' from a datetime, a Graph timestamp or a Graph {'dateTime': ...} value"""
+    if isinstance(value, dict):
+        value = value.get('dateTime')
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    return (value or '')[:19]
+
+
+def time_slices(start, end, count):
+    """Split [start, end) into count equal, contiguous (start, end) sub-ranges, oldest first"""
+    step = (end - start) / count
+    bounds = [start + step * index for index in range(count)] + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date); None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class BatchedResponse:
+    """One response unpacked from a $batch call, with the parts of requests.Response GraphClient uses"""
+
+    def __init__(self, url, status_code, headers, body):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    @property
+    def content(self):
+        """The body re-encoded compactly, standing in for its share of the $batch payload"""
+        return json.dumps(self._body, separators=(',', ':')).encode('utf-8')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            error = (self._body or {}).get('error', {}) if isinstance(self._body, dict) else {}
+            raise requests.HTTPError(
+                f"{self.status_code} Error: {error.get('code', 'batched request failed')} for url: {self.url}",
+                response=self
+            )
+
+    def close(self):
+        pass
+
+
+class _BatchCall:
+    def __init__(self, url, params, headers, stream, timeline):
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self.stream = stream
+        self.timeline = timeline
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class _Batcher:
+    """
+    Coalesces GETs issued at about the same time from different threads (the
+    profile, calendar and mail fetches, parallel date slices) into Graph
+    $batch calls of up to MAX_BATCH_REQUESTS.
+
+    The first caller to arrive waits `linger` seconds for others, then sends
+    everything that queued up meanwhile; a lone request is sent as a plain
+    GET. It only waits while another request is in flight: with none, no
+    other thread is fetching, so sequential page walks (nextLink chains,
+    delta downloads) go out at once. Each caller gets its own response back
+    (or the transport error of the whole call), so retrying stays with
+    GraphClient._fetch.
+    """
+
+    def __init__(self, client, linger):
+        self.client = client
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._pending = []
+        self._in_flight = 0  # Callers inside get(), queued or waiting for their response
+
+    def get(self, url, params=None, headers=None, stream=False, timeline=None):
+        call = _BatchCall(url, params, headers, stream, timeline)
+        with self._lock:
+            self._pending.append(call)
+            leader = len(self._pending) == 1
+            others = self._in_flight
+            self._in_flight += 1
+        try:
+            if leader:
+                if others:
+                    time.sleep(self.linger)
+                with self._lock:
+                    calls, self._pending = self._pending, []
+                for start in range(0, len(calls), MAX_BATCH_REQUESTS):
+                    self._dispatch(calls[start:start + MAX_BATCH_REQUESTS])
+            call.done.wait()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if call.error is not None:
+            raise call.error
+        return call.response
+
+    def _dispatch(self, calls):
+        try:
+            if len(calls) == 1:
+                call = calls[0]
+                call.response = self.client._send(call.url, call.params, call.headers, call.stream)
+            else:
+                self._send_batch(calls)
+        except Exception as e:
+            for call in calls:
+                call.error = e
+        finally:
+            for call in calls:
+                call.done.set()
+
+    def _send_batch(self, calls):
+        body = {'requests': [
+            {'id': str(index), 'method': 'GET', 'url': self.client._relative_url(call.url, call.params),
+             **({'headers': call.headers} if call.headers else {})}
+            for index, call in enumerate(calls)
+        ]}
+        response = self.client._post(f'{self.client.base_url}/$batch', body)
+        # Each run whose requests rode along counts the call as one of its round trips
+        for timeline in {id(call.timeline): call.timeline for call in calls if call.timeline is not None}.values():
+            timeline.count('graph.batches')
+        for call in calls:
+            if call.timeline is not None:
+                call.timeline.count('graph.batched_requests')
+        if response.status_code != 200:
+            # The whole call was throttled or failed; every caller gets its own copy of that status
+            # (and Retry-After) and retries on its own
+            try:
+                error = response.json()
+            except ValueError:
+                error = None
+            finally:
+                response.close()
+            for call in calls:
+                call.response = BatchedResponse(call.url, response.status_code, response.headers, error)
+            return
+        # Decoded one sub-response at a time rather than all twenty pages at once
+        pending = {str(index): call for index, call in enumerate(calls)}
+        for item in JsonObjectStream(response.iter_content(Config.GRAPH_STREAM_CHUNK_KB * 1024), 'responses'):
+            call = pending.pop(item.get('id'), None)
+            if call is not None:
+                call.response = BatchedResponse(call.url, item.get('status', 500), item.get('headers'), item.get('body'))
+        for call_id, call in pending.items():
+            call.error = requests.ConnectionError(f"$batch response is missing request {call_id}")
+
 
 class GraphClient:
     """Client for interacting with Microsoft Graph API with delegated permissions"""
 
-    def __init__(self, access_token):
+    def __init__(self, access_token, session=None, use_delta=None, use_cache=None):
+        """
+        Args:
+            access_token: Delegated Graph access token
+            session: requests.Session to send requests with (default: the shared pooled session)
+            use_delta: Sync calendar and sent mail with delta queries into the local
+                       item store (default: Config.GRAPH_DELTA_ENABLED)
+            use_cache: Serve and revalidate GET responses from the on-disk response
+                       cache (default: Config.GRAPH_CACHE_ENABLED)
+        """
         self.access_token = access_token
         self.headers = {
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
         self.base_url = Config.GRAPH_API_ENDPOINT
+        self.session = session or shared_session()
+        self.timeout = (Config.GRAPH_CONNECT_TIMEOUT, Config.GRAPH_READ_TIMEOUT)
+        self.max_retries = Config.GRAPH_MAX_RETRIES
+        self._stats = {'requests': 0, 'batches': 0, 'batched_requests': 0, 'retries': 0, 'throttled': 0,
+                       'connection_errors': 0, 'retry_wait_seconds': 0.0}
+        self._stats_lock = threading.Lock()  # Calendar and mail pages are fetched on separate threads
+        use_delta = Config.GRAPH_DELTA_ENABLED if use_delta is None else use_delta
+        self.delta_store = DeltaStore(Config.GRAPH_DELTA_FILE) if use_delta else None
+        use_cache = Config.GRAPH_CACHE_ENABLED if use_cache is None else use_cache
+        self.response_cache = ResponseCache(
+            Config.GRAPH_CACHE_FILE, Config.GRAPH_CACHE_MAX_MB * 1024 * 1024,
+            {'profile': Config.GRAPH_CACHE_PROFILE_TTL, 'pages': Config.GRAPH_CACHE_PAGE_TTL,
+             'metadata': Config.GRAPH_CACHE_METADATA_TTL}
+        ) if use_cache else None
+        self._cache_account = account_id(access_token)  # Cache entries are per signed-in account
+        self.sync_stats = {}  # Per source: how the last delta sync went
+        self._payload = {}  # Per source: items and response bytes received
+        self._payload_samples = {}  # Per source: thread measuring the size of unprojected items
+        self._batcher = _Batcher(self, Config.GRAPH_BATCH_LINGER_MS / 1000) if Config.GRAPH_BATCH_ENABLED else None
+
+    def http_stats(self, timeline=None):
+        """
+        Requests made, round trips they took ($batch calls carry several
+        requests), retries, throttled responses, connection errors and time
+        spent waiting to retry; since the client was created, or only for the
+        run recorded in `timeline` (the client is shared by concurrent runs
+        in the web app)
+        """
+        if timeline is not None:
+            counters = timeline.counters()
+            stats = {key: counters.get(f'graph.{key}', 0) for key in self._stats}
+        else:
+            with self._stats_lock:
+                stats = dict(self._stats)
+        stats['round_trips'] = stats['requests'] - stats['batched_requests'] + stats['batches']
+        stats['retry_wait_seconds'] = round(float(stats['retry_wait_seconds']), 3)
+        return stats
+
+    def payload_stats(self):
+        """
+        Items and response bytes received per source, and, where a sample was
+        measured, the estimated bytes the field projection saved (bytes
+        received x how much larger the same sample items are unprojected)
+        """
+        stats = {}
+        for sample in list(self._payload_samples.values()):
+            sample.join(timeout=Config.GRAPH_READ_TIMEOUT)
+        with self._stats_lock:
+            for source, payload in self._payload.items():
+                stats[source] = {'items': payload['items'], 'bytes': payload['bytes']}
+                if 'full_ratio' in payload:
+                    stats[source]['saved_bytes'] = max(0, round(payload['bytes'] * (payload['full_ratio'] - 1)))
+        return stats
+
+    def reset_payload_stats(self):
+        """Start counting payload afresh (the client outlives a single run in the web app)"""
+        with self._stats_lock:
+            self._payload = {}
+        self._payload_samples = {}
+
+    def _record_payload(self, source, size, items):
+        with self._stats_lock:
+            payload = self._payload.setdefault(source, {'items': 0, 'bytes': 0})
+            payload['items'] += items
+            payload['bytes'] += size
+
+    def _sample_full_size(self, source, url, params, fields):
+        """
+        Fetch the same few items with and without the field projection on a
+        background thread (sharing a $batch call with the first real
+        requests), for the payload-saved estimate. Both samples ask for the
+        same body format, so only the projection differs. Off unless
+        GRAPH_PAYLOAD_SAMPLE is set, and skipped when nothing is projected
+        away; delta pages aren't sampled, so delta sync reports no estimate.
+        """
+        if Config.GRAPH_PAYLOAD_SAMPLE <= 0 or tuple(fields) == FULL_FIELDS[source]:
+            return
+        sample_params = dict(params, **{'$top': Config.GRAPH_PAYLOAD_SAMPLE})
+
+        def sample():
+            try:
+                headers = self._body_headers(fields)
+                full, _ = self._get(url, dict(sample_params, **{'$select': ','.join(FULL_FIELDS[source])}), headers)
+                projected, _ = self._get(url, sample_params, headers)
+            except requests.RequestException:
+                return
+            if projected.content:
+                with self._stats_lock:
+                    self._payload.setdefault(source, {'items': 0, 'bytes': 0})['full_ratio'] = \
+                        len(full.content) / len(projected.content)
+
+        thread = threading.Thread(target=sample, name=f'graph-sample-{source}', daemon=True)
+        self._payload_samples[source] = thread
+        thread.start()
+
+    @staticmethod
+    def _body_headers(fields, *preferences):
+        """Prefer header asking for plain-text bodies when 'body' is among the fields (the analyzer strips markup anyway)"""
+        if 'body' in fields:
+            preferences += ('outlook.body-content-type="text"',)
+        return {'Prefer': ', '.join(preferences)} if preferences else None
+
+    def _count(self, key, amount=1, timeline=None):
+        with self._stats_lock:
+            self._stats[key] += amount
+        if timeline is not None:
+            timeline.count(f'graph.{key}', amount)
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(Config.GRAPH_BACKOFF_MAX, Config.GRAPH_BACKOFF_BASE * 2 ** attempt))
+
+    def _send(self, url, params=None, headers=None, stream=False):
+        """One plain GET; with stream, the body is left to be read by the caller"""
+        return self.session.get(url, headers=dict(self.headers, **headers) if headers else self.headers,
+                                params=params, timeout=self.timeout, stream=stream)
+
+    def _post(self, url, body):
+        """One $batch POST"""
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['batched_requests'] += len(body['requests'])
+        return self.session.post(url, headers=self.headers, json=body, timeout=self.timeout, stream=True)
+
+    def _relative_url(self, url, params=None):
+        """A request URL relative to the API version root, as $batch expects"""
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        if params:
+            url += ('&' if '?' in url else '?') + urlencode(params, quote_via=quote, safe="$,'")
+        return url
+
+    def cache_stats(self):
+        """Response cache hits, revalidations, misses, evictions and size; None when the cache is off"""
+        return self.response_cache.stats() if self.response_cache is not None else None
+
+    def _get(self, url, params=None, headers=None, stream=False, timeline=None):
+        """
+        GET through the response cache: a fresh cached response is served
+        without a request, a stale one with an ETag is revalidated with
+        If-None-Match (304 serves it again) and a new 200 response is stored
+        (a streamed one once the caller has read it to the end). Delta
+        queries bypass the cache.
+
+        Returns:
+            (response, retries)
+        """
+        cache = self.response_cache
+        ttl = cache.ttl(url) if cache is not None else None
+        if ttl is None:
+            return self._fetch(url, params, headers, stream, timeline)
+
+        key = self._cache_account + ' ' + fixture_key('GET', self._relative_url(url, params),
+                                                      (headers or {}).get('Prefer'), resolution=CACHE_KEY_RESOLUTION)
+        entry = cache.get(key)
+        if entry is not None and entry['expires'] > time.time():
+            cache.count('hits')
+            return CachedResponse(url, entry), 0
+        if entry is not None and entry['etag']:
+            headers = dict(headers or {}, **{'If-None-Match': entry['etag']})
+
+        response, retries = self._fetch(url, params, headers, stream, timeline)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            cache.refresh(key, ttl)
+            cache.count('revalidated')
+            return CachedResponse(url, entry), retries
+        cache.count('misses')
+        if response.status_code == 200:
+            if stream and not isinstance(response, BatchedResponse):
+                status, response_headers = response.status_code, response.headers
+                response = CachingResponse(
+                    response, lambda body: cache.put(key, status, response_headers, body, ttl)
+                )
+            else:
+                cache.put(key, response.status_code, response.headers, zlib.compress(response.content), ttl)
+        return response, retries
+
+    def _fetch(self, url, params=None, headers=None, stream=False, timeline=None):
+        """
+        GET with timeouts, retrying throttled (429/503), transient 5xx and
+        connection failures. Retry-After is honored when Graph sends it
+        (with a little jitter so parallel requests don't retry in lockstep);
+        otherwise the wait backs off exponentially.
 
-    def get_user_profile(self):
+        Requests made concurrently from several threads are combined into
+        $batch calls when batching is enabled. With stream, a successful
+        response's body is left unread for the caller to decode as it
+        arrives (responses unpacked from a $batch call are already decoded).
+        Requests, retries and waits are also counted on `timeline`, if given.
+
+        Returns:
+            (response, retries)
+        """
+        for attempt in range(self.max_retries + 1):
+            self._count('requests', timeline=timeline)
+            try:
+                if self._batcher is not None:
+                    response = self._batcher.get(url, params, headers, stream, timeline)
+                else:
+                    response = self._send(url, params, headers, stream)
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                self._count('connection_errors', timeline=timeline)
+                wait = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    if stream and response.status_code >= 400:
+                        # Error bodies are small; reading one hands the connection back to the pool
+                        response.content
+                    response.raise_for_status()
+                    return response, attempt
+                if response.status_code in THROTTLE_STATUSES:
+                    self._count('throttled', timeline=timeline)
+                wait = retry_after_seconds(response.headers.get('Retry-After'))
+                wait = self._backoff(attempt) if wait is None else wait * random.uniform(1.0, 1.1)
+                response.close()
+            self._count('retries', timeline=timeline)
+            self._count('retry_wait_seconds', wait, timeline)
+            time.sleep(wait)
+
+    def get_user_profile(self, timeline=None):
         """Get the authenticated user's profile"""
         url = f'{self.base_url}/me'
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        timeline = timeline or Timeline()
+        with timeline.span('fetch.profile') as span:
+            response, span['retries'] = self._get(url, timeline=timeline)
+            return response.json()
     
-    def get_calendar_events(self, days_back=30):
+    def _stream_page(self, url, params=None, headers=None, timeline=None, stage='fetch.items.page', source='items',
+                     keep=None, members=None):
         """
-        Fetch calendar events from the past N days for the specified user
+        Request one page and yield its items as they are decoded from the
+        response stream, each cut down to the `keep` properties before the
+        next one is read, so decoding holds one item at a time rather than
+        the whole page (up to 999 items with bodies).
+
+        If the connection drops partway through the body, the page is
+        requested again and the items already yielded are skipped (Graph
+        returns a page's items in the same order). The response is closed
+        however iteration ends, including a consumer that stops early.
+
+        Args:
+            url, params, headers: The page request
+            timeline: Records the request as a `stage` span and the time spent
+                      reading and decoding the body under 'fetch.<source>.decode'
+            stage: Span name for the request
+            source: Payload statistics key and stage name part
+            keep: Item properties to keep (default: all)
+            members: Dict filled with the page's other members (@odata.nextLink, @odata.deltaLink)
+        """
+        timeline = timeline or Timeline()
+        members = {} if members is None else members
+        delivered = 0
+        for attempt in range(self.max_retries + 1):
+            # Only the request itself is timed here, not the caller's work between items
+            with timeline.span(stage) as span:
+                response, span['retries'] = self._get(url, params, headers, stream=True, timeline=timeline)
+            if isinstance(response, BatchedResponse):
+                # Already decoded as part of its $batch call
+                stream = None
+                page = dict(response.json() or {})
+                items = iter(page.pop('value', []))
+            else:
+                stream = JsonObjectStream(response.iter_content(Config.GRAPH_STREAM_CHUNK_KB * 1024), 'value')
+                items = iter(stream)
+            index = fresh = 0
+            decoding = 0.0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    item = next(items, None)
+                    decoding += time.perf_counter() - started
+                    if item is None:
+                        break
+                    index += 1
+                    if index <= delivered:
+                        continue
+                    delivered = index
+                    fresh += 1
+                    yield item if keep is None else {key: value for key, value in item.items() if key in keep}
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                self._count('connection_errors', timeline=timeline)
+                wait = self._backoff(attempt)
+                self._count('retries', timeline=timeline)
+                self._count('retry_wait_seconds', wait, timeline)
+                time.sleep(wait)
+                continue
+            finally:
+                # Also reached when the consumer stops early (GeneratorExit), so the pooled connection is released
+                response.close()
+                timeline.add(f'fetch.{source}.decode', decoding, fresh)
+                self._record_payload(source, stream.bytes if stream else len(response.content), fresh)
+            members.update(stream.members if stream else page)
+            return
+
+    def _iter_items(self, url, params=None, timeline=None, source='items', headers=None, keep=None):
+        """Follow @odata.nextLink, yielding items as each page is decoded"""
+        timeline = timeline or Timeline()
+        while url:
+            members = {}
+            yield from self._stream_page(url, params, headers, timeline, f'fetch.{source}.page', source, keep, members)
+            url = members.get('@odata.nextLink')
+            params = None  # nextLink includes all params
+
+    def _probe_count(self, url, params, timeline, stage):
+        """Number of items a query matches, from a one-item $count request; None if Graph doesn't report it"""
+        probe = dict(params, **{'$count': 'true', '$top': 1, '$select': 'id'})
+        with timeline.span(stage) as span:
+            try:
+                response, span['retries'] = self._get(url, probe, timeline=timeline)
+            except requests.HTTPError:
+                return None
+            count = response.json().get('@odata.count')
+            span['items'] = count or 0
+        return count
+
+    def _slice_count(self, url, params, timeline, source):
+        """How many date sub-ranges to paginate in parallel: one per GRAPH_SLICE_ITEMS items, at most GRAPH_PARALLEL_SLICES"""
+        if Config.GRAPH_PARALLEL_SLICES <= 1:
+            return 1
+        count = self._probe_count(url, params, timeline, f'fetch.{source}.count')
+        if count is None:
+            return Config.GRAPH_PARALLEL_SLICES
+        return max(1, min(Config.GRAPH_PARALLEL_SLICES, math.ceil(count / max(Config.GRAPH_SLICE_ITEMS, 1))))
+
+    def _iter_sliced(self, url, slice_params, start, end, timeline=None, source='items', newest_first=False,
+                     headers=None, keep=None):
+        """
+        Yield the items of a date-windowed query, splitting the window into
+        sub-ranges that are paginated in parallel.
+
+        The number of sub-ranges comes from a $count probe of the whole
+        window. Sub-ranges are yielded one after another (newest first if
+        asked) while the later ones keep downloading, each buffering at most
+        STREAM_PREFETCH_ITEMS items; items seen in an earlier sub-range (e.g.
+        a meeting spanning a boundary) are dropped by id.
+
+        Args:
+            url: Collection URL
+            slice_params: (start, end, last) -> query parameters for one sub-range
+            start, end: The whole window, as UTC datetimes
+            timeline: Records the probe and each page request
+            source: Stage name part ('calendar' or 'email')
+            newest_first: Yield the newest sub-range first
+            headers: Extra request headers
+            keep: Item properties to keep (default: all)
+        """
+        timeline = timeline or Timeline()
+        slice_count = self._slice_count(url, slice_params(start, end, True), timeline, source)
+        if slice_count == 1:
+            yield from self._iter_items(url, slice_params(start, end, True), timeline, source, headers, keep)
+            return
+
+        slices = time_slices(start, end, slice_count)
+        last = slices[-1]
+        if newest_first:
+            slices.reverse()
+        executor = ThreadPoolExecutor(max_workers=slice_count, thread_name_prefix=f'graph-{source}')
+        streams = [
+            prefetch(self._iter_items(url, slice_params(slice_start, slice_end, (slice_start, slice_end) == last),
+                                      timeline, source, headers, keep), Config.STREAM_PREFETCH_ITEMS, executor)
+            for slice_start, slice_end in slices
+        ]
+        seen = set()
+        try:
+            for stream in streams:
+                for item in stream:
+                    item_id = item.get('id')
+                    if item_id is not None:
+                        if item_id in seen:
+                            continue
+                        seen.add(item_id)
+                    yield item
+        finally:
+            for stream in streams:
+                stream.close()
+            executor.shutdown(wait=False)
+
+    def _sync_delta(self, source, url, params, window_start, window_end, item_times, fields, timeline):
+        """
+        Bring the local copy of a collection up to date with a delta query
+
+        Continues from the stored @odata.deltaLink when its window covers the
+        requested one; otherwise (first run, a longer or later window, or Graph
+        reporting the sync state as expired with 410 Gone) the collection is
+        downloaded in full and the new delta link stored. Items that ended
+        before the window are dropped from the store afterwards. Only the
+        requested fields of each item are stored, so asking for a field the
+        store doesn't have also means a full download.
+
+        Args:
+            source: Collection name in the store and stage name part ('calendar' or 'email')
+            url, params: The initial (full download) delta request
+            window_start: Start of the requested window, as a time key
+            window_end: (needed, requested): the time key the stored window must
+                        reach and the end the initial request asks for; None for
+                        open-ended collections
+            item_times: item -> (start, end) time keys
+            fields: Item properties to keep
+            timeline: Records each delta page request as a 'fetch.<source>.delta' span
+        """
+        needed_end, requested_end = window_end or (None, None)
+        stored = self.delta_store.link(source)
+        full = (stored is None or stored['window_start'] > window_start
+                or (needed_end is not None and (stored['window_end'] or '') < needed_end)
+                or (stored['fields'] is not None and not set(fields) <= set(stored['fields'])))
+        request = (url, params) if full else (stored['delta_link'], None)
+        if full:
+            self.delta_store.reset(source)
+        stats = {'full_sync': full, 'changed': 0, 'removed': 0}
+        # Delta pages default to a handful of items
+        headers = self._body_headers(fields, 'odata.maxpagesize=999')
+        keep = set(fields) | {'id', '@removed'}
+        delta_link = None
+        while request[0]:
+            members = {}
+            changes, removals = [], []
+            try:
+                for item in self._stream_page(*request, headers, timeline, f'fetch.{source}.delta', source, keep,
+                                              members):
+                    if '@removed' in item:
+                        removals.append(item['id'])
+                    else:
+                        changes.append((item['id'], *item_times(item), item))
+                    # Applied in groups as the page decodes rather than once it is all in memory
+                    if len(changes) + len(removals) >= DELTA_APPLY_ITEMS:
+                        self._apply_delta(source, changes, removals, stats)
+                        changes, removals = [], []
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 410 or stats['full_sync']:
+                    raise
+                # The sync state expired; start over with a full download
+                self.delta_store.reset(source)
+                stats = {'full_sync': True, 'changed': 0, 'removed': 0}
+                request = (url, params)
+                continue
+            self._apply_delta(source, changes, removals, stats)
+            request = (members.get('@odata.nextLink'), None)
+            delta_link = members.get('@odata.deltaLink', delta_link)
+
+        self.delta_store.prune(source, window_start)
+        if delta_link:
+            # Items before window_start are gone now, so a longer window later means a full download
+            end = requested_end if stats['full_sync'] else stored['window_end']
+            self.delta_store.save_link(source, delta_link, window_start, end, fields)
+        stats['stored'] = self.delta_store.count(source)
+        self.sync_stats[source] = stats
+
+    def _apply_delta(self, source, changes, removals, stats):
+        self.delta_store.apply(source, changes, removals)
+        stats['changed'] += len(changes)
+        stats['removed'] += len(removals)
+
+    def iter_calendar_events(self, days_back=30, timeline=None, fields=None):
+        """
+        Stream calendar events from the past N days, fetching pages as they are consumed.
+        The window is split into date sub-ranges that are fetched in parallel.
+
+        With delta sync (GRAPH_DELTA_ENABLED) the window isn't split; instead
+        only changes since the last run are downloaded (through /calendarView/delta, over a window reaching GRAPH_DELTA_AHEAD_DAYS
+        into the future so it stays valid for the coming runs) and the events
+        are read back from the local item store, ordered by start time.
+
+        Only the given fields are requested ($select; calendarView delta doesn't
+        support it, so there they are projected before storing), and bodies
+        come as plain text when 'body' is one of them.
 
         Args:
             days_back: Number of days to look back (default: 30)
+            timeline: Records the $count probe ('fetch.calendar.count') and each
+                      page request as a 'fetch.calendar.page' span ('fetch.calendar.delta' with delta sync);
+                      reading and decoding the pages adds up under 'fetch.calendar.decode'
+            fields: Event properties needed (default: FULL_FIELDS['calendar'])
 
-        Returns:
-            List of calendar events
+        Yields:
+            Calendar event dictionaries
         """
-        start_date = datetime.utcnow() - timedelta(days=days_back)
+        fields = tuple(fields or FULL_FIELDS['calendar'])
         end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days_back)
 
-        # Format dates for Graph API
-        start_str = start_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-        end_str = end_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        def slice_params(slice_start, slice_end, last):
+            return {
+                'startDateTime': graph_time(slice_start),
+                'endDateTime': graph_time(slice_end),
+                '$top': 999,  # Get up to 999 events
+                '$select': ','.join(fields)
+            }
 
-        url = f'{self.base_url}/users/{self.user_email}/calendarview'
-        params = {
-            'startDateTime': start_str,
-            'endDateTime': end_str,
-            '$top': 999,  # Get up to 999 events
-            '$select': 'subject,start,end,attendees,organizer,body'
-        }
+        url = f'{self.base_url}/me/calendarview'
 
-        events = []
-        while url:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            events.extend(data.get('value', []))
+        if self.delta_store is not None:
+            synced_end = end_date + timedelta(days=Config.GRAPH_DELTA_AHEAD_DAYS)
+            self._sync_delta(
+                'calendar', f'{self.base_url}/me/calendarView/delta',
+                {'startDateTime': graph_time(start_date), 'endDateTime': graph_time(synced_end)},
+                time_key(start_date), (time_key(end_date), time_key(synced_end)),
+                lambda event: (time_key(event.get('start')), time_key(event.get('end'))),
+                fields, timeline or Timeline()
+            )
+            yield from self.delta_store.items('calendar', time_key(start_date), time_key(end_date))
+            return
 
-            # Handle pagination
-            url = data.get('@odata.nextLink')
-            params = None  # nextLink includes all params
+        self._sample_full_size('calendar', url, slice_params(start_date, end_date, True), fields)
+        yield from self._iter_sliced(url, slice_params, start_date, end_date, timeline, 'calendar',
+                                     headers=self._body_headers(fields), keep=set(fields) | {'id'})
 
-        return events
-    
-    def get_sent_emails(self, days_back=30):
+    def get_calendar_events(self, days_back=30, fields=None):
         """
-        Fetch sent emails from the past N days for the specified user
+        Fetch calendar events from the past N days for the specified user
 
         Args:
             days_back: Number of days to look back (default: 30)
+            fields: Event properties needed (default: FULL_FIELDS['calendar'])
 
         Returns:
-            List of sent email messages
+            List of calendar events
         """
-        start_date = datetime.utcnow() - timedelta(days=days_back)
-        start_str = start_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        return list(self.iter_calendar_events(days_back, fields=fields))
 
-        url = f'{self.base_url}/users/{self.user_email}/mailFolders/SentItems/messages'
-        params = {
-            '$filter': f'sentDateTime ge {start_str}',
-            '$top': 999,
-            '$select': 'subject,sentDateTime,toRecipients,ccRecipients,body,bodyPreview'
-        }
+    def iter_sent_emails(self, days_back=30, timeline=None, fields=None):
+        """
+        Stream sent emails from the past N days, fetching pages as they are consumed.
+        The window is split into date sub-ranges that are fetched in parallel.
 
-        emails = []
-        while url:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            emails.extend(data.get('value', []))
+        With delta sync (GRAPH_DELTA_ENABLED) the window isn't split; instead
+        only changes since the last run are downloaded (through SentItems/messages/delta) and the emails are read back from
+        the local item store.
 
-            # Handle pagination
-            url = data.get('@odata.nextLink')
-            params = None  # nextLink includes all params
+        Only the given fields are requested ($select), and bodies come as
+        plain text when 'body' is one of them.
+
+        Args:
+            days_back: Number of days to look back (default: 30)
+            timeline: Records the $count probe ('fetch.email.count') and each
+                      page request as a 'fetch.email.page' span ('fetch.email.delta' with delta sync);
+                      reading and decoding the pages adds up under 'fetch.email.decode'
+            fields: Message properties needed (default: FULL_FIELDS['email'])
+
+        Yields:
+            Sent email message dictionaries, newest first
+        """
+        fields = tuple(fields or FULL_FIELDS['email'])
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days_back)
+        select = ','.join(fields)
+
+        def slice_params(slice_start, slice_end, last):
+            # The newest sub-range is left open-ended, like the unsplit query
+            window = f'sentDateTime ge {graph_time(slice_start)}'
+            if not last:
+                window += f' and sentDateTime lt {graph_time(slice_end)}'
+            return {
+                '$filter': window,
+                '$top': 999,
+                '$select': select
+            }
+
+        url = f'{self.base_url}/me/mailFolders/SentItems/messages'
+
+        if self.delta_store is not None:
+            # Message delta queries can only filter on receivedDateTime, which sent items also carry
+            self._sync_delta(
+                'email', f'{url}/delta',
+                {'$filter': f'receivedDateTime ge {graph_time(start_date)}', '$select': select},
+                time_key(start_date), None,
+                lambda message: (time_key(message.get('sentDateTime')),) * 2,
+                fields, timeline or Timeline()
+            )
+            yield from self.delta_store.items('email', time_key(start_date), '9999', newest_first=True)
+            return
+
+        self._sample_full_size('email', url, slice_params(start_date, end_date, True), fields)
+        yield from self._iter_sliced(url, slice_params, start_date, end_date, timeline, 'email', newest_first=True,
+                                     headers=self._body_headers(fields), keep=set(fields) | {'id'})
 
-        return emails
+    def get_sent_emails(self, days_back=30, fields=None):
+        """
+        Fetch sent emails from the past N days for the specified user
+
+        Args:
+            days_back: Number of days to look back (default: 30)
+            fields: Message properties needed (default: FULL_FIELDS['email'])
 
+        Returns:
+            List of sent email messages
+        """
+        return list(self.iter_sent_emails(days_back, fields=fields))
@@ -0,0 +1,318 @@
+"""
+Pluggable transports for the Graph API session
+
+GRAPH_TRANSPORT picks what GraphClient's requests actually talk to:
+
+- live: Microsoft Graph (the default)
+- record: Microsoft Graph, saving every response as a gzip-compressed
+  fixture in GRAPH_FIXTURES_DIR
+- replay: the recorded fixtures, without network access or sign-in
+- mock: a local mock Graph server (mock_graph.py) at GRAPH_MOCK_URL, or one
+  started in-process serving the recorded fixtures (or a synthetic mailbox
+  when there are none), also without sign-in
+
+Transports are requests transport adapters mounted on the Graph host, so
+GraphClient's pooling, retries, batching, streaming and delta sync run
+unchanged on top of them.
+"""
+
+import io
+import re
+import json
+import gzip
+import time
+import hashlib
+import threading
+from pathlib import Path
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from config import Config
+
+TRANSPORTS = ('live', 'record', 'replay', 'mock')
+
+# Transports that never reach Microsoft, so no sign-in is needed
+OFFLINE_TRANSPORTS = ('replay', 'mock')
+OFFLINE_TOKEN = 'offline'
+
+# Query values that change from run to run (windows are computed from the current time)
+TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?Z?')
+
+# Links in a recorded body that lead to further requests
+LINK_MEMBERS = ('@odata.nextLink', '@odata.deltaLink')
+
+# Response headers worth keeping in a fixture
+RECORDED_HEADERS = ('Content-Type', 'Retry-After', 'Preference-Applied')
+
+
+def graph_path(url: str) -> str:
+    """A Graph URL's path below the API version, e.g. '/me/calendarview' (absolute or version-relative URLs)"""
+    path = urlsplit(url).path
+    for version in ('/v1.0', '/beta'):
+        if path.startswith(version + '/') or path == version:
+            return path[len(version):] or '/'
+    return path
+
+
+def _relative_times(value: str, now: datetime, resolution: int = 1) -> str:
+    """Timestamps in a query value as minutes from now, rounded to a resolution, e.g. '<now-43200m>'"""
+    def offset(match):
+        steps = round((datetime.fromisoformat(match.group(0)[:19]) - now).total_seconds() / 60 / resolution)
+        return f'<now{steps * resolution:+d}m>'
+    return TIMESTAMP.sub(offset, value)
+
+
+def shift_link(url: str, seconds: float) -> str:
+    """A recorded link with the timestamps in its query moved by a number of seconds"""
+    def shifted(match):
+        when = datetime.fromisoformat(match.group(0)[:19]) + timedelta(seconds=round(seconds))
+        return when.strftime('%Y-%m-%dT%H:%M:%S') + match.group(0)[19:]
+
+    parts = urlsplit(url)
+    query = [(name, TIMESTAMP.sub(shifted, value)) for name, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return parts._replace(query=urlencode(query, quote_via=quote, safe="$,'")).geturl()
+
+
+def fixture_key(method: str, url: str, prefer: str = None, now: datetime = None, resolution: int = 1) -> str:
+    """
+    The name a request is recorded and replayed under: method, path and
+    sorted query, plus the Prefer header (it changes the body Graph returns).
+    Timestamps in the query are written relative to the time of the request,
+    in minutes rounded to `resolution`, so windows computed from the current
+    time match between a recording and a later replay while date slices of
+    one window stay apart.
+    """
+    now = now or datetime.utcnow()
+    query = sorted((name, _relative_times(value, now, resolution)) for name, value in parse_qsl(urlsplit(url).query))
+    key = f"{method.upper()} {graph_path(url)}"
+    if query:
+        key += '?' + urlencode(query, safe="$<>+,'")
+    if prefer:
+        key += f" [{prefer}]"
+    return key
+
+
+def batch_requests(body: bytes) -> List[Dict]:
+    """The sub-requests of a $batch request body"""
+    return json.loads(body or b'{}').get('requests', [])
+
+
+def build_response(request, status: int, headers: Dict, body) -> Response:
+    """A requests.Response served from memory, readable whole or streamed"""
+    content = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8') if body is not None else b''
+    response = Response()
+    response.status_code = status
+    response.reason = 'Recorded'
+    response.headers = CaseInsensitiveDict(headers or {})
+    if body is not None and 'Content-Type' not in response.headers:
+        response.headers['Content-Type'] = 'application/json'
+    response.raw = io.BytesIO(content)
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def _decoded_body(response: Response):
+    """A response body as JSON if it is JSON, otherwise as text"""
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+class FixtureStore:
+    """
+    Recorded Graph responses, one gzip-compressed JSON file per fixture key
+    holding every response the key got, in order (a throttled request and
+    its retry are both kept, so replay throttles where the recording did)
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Where the fixture files live
+        """
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}.json.gz"
+
+    def _read(self, path: Path) -> Optional[Dict]:
+        if not path.exists():
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def append(self, key: str, status: int, headers: Dict, body):
+        """Record one more response for a key"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            fixture = self._read(path) or {'key': key, 'responses': []}
+            fixture['responses'].append({
+                'recorded_at': time.time(),
+                'status': status,
+                'headers': {name: headers[name] for name in RECORDED_HEADERS if name in headers},
+                'body': body
+            })
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                json.dump(fixture, f)
+
+    def responses(self, key: str) -> Optional[List[Dict]]:
+        """Every response recorded for a key, in order; None if it was never recorded"""
+        fixture = self._read(self._path(key))
+        return fixture['responses'] if fixture else None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Every fixture ({'key', 'responses'})"""
+        for path in sorted(self.directory.glob('*.json.gz')):
+            yield self._read(path)
+
+    def __len__(self) -> int:
+        return len(list(self.directory.glob('*.json.gz'))) if self.directory.exists() else 0
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Sends requests to Graph as usual and records each response. The
+    sub-responses of a $batch call are recorded under their own GET keys, so
+    replay doesn't depend on which requests happened to be batched together.
+    """
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # Read the whole body now; a streaming caller then reads it from memory
+        body = _decoded_body(response)
+        if request.method == 'POST' and graph_path(request.url) == '/$batch' and response.status_code == 200:
+            sent = {item.get('id'): item for item in batch_requests(request.body)}
+            for item in body.get('responses', []):
+                sub_request = sent.get(item.get('id'), {})
+                self.store.append(
+                    fixture_key('GET', sub_request.get('url', ''), (sub_request.get('headers') or {}).get('Prefer')),
+                    item.get('status', 500), CaseInsensitiveDict(item.get('headers') or {}), item.get('body')
+                )
+        else:
+            self.store.append(fixture_key(request.method, request.url, request.headers.get('Prefer')),
+                              response.status_code, response.headers, body)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded responses instead of sending requests. A key's responses
+    are served in recorded order, the last one repeating once they run out.
+    $batch calls are answered from the sub-requests' own fixtures. Timestamps
+    in the recorded next and delta links are moved forward by the time since
+    the recording, in step with the windows the client computes now.
+
+    A request that was never recorded gets 404 (code 'FixtureNotFound'),
+    except a delta or skip token Graph handed out in another run, which gets
+    410 Gone so GraphClient falls back to the recorded full download.
+    """
+
+    def __init__(self, store: FixtureStore):
+        super().__init__()
+        self.store = store
+        self._served = Counter()
+        self._lock = threading.Lock()
+
+    def _next(self, method: str, url: str, prefer: str = None) -> Dict:
+        key = fixture_key(method, url, prefer)
+        responses = self.store.responses(key)
+        if not responses:
+            query = urlsplit(url).query
+            if graph_path(url).endswith('/delta') and ('deltatoken' in query or 'skiptoken' in query):
+                return {'status': 410, 'headers': {},
+                        'body': {'error': {'code': 'SyncStateNotFound', 'message': f'No fixture for {key}'}}}
+            return {'status': 404, 'headers': {},
+                    'body': {'error': {'code': 'FixtureNotFound', 'message': f'No fixture for {key}'}}}
+        with self._lock:
+            index = min(self._served[key], len(responses) - 1)
+            self._served[key] += 1
+        recorded = dict(responses[index])
+        body = recorded['body']
+        if isinstance(body, dict) and any(member in body for member in LINK_MEMBERS):
+            elapsed = time.time() - recorded.get('recorded_at', time.time())
+            recorded['body'] = dict(body, **{member: shift_link(body[member], elapsed)
+                                             for member in LINK_MEMBERS if member in body})
+        return recorded
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.method == 'POST' and graph_path(request.url) == '/$batch':
+            responses = []
+            for item in batch_requests(request.body):
+                recorded = self._next('GET', item.get('url', ''), (item.get('headers') or {}).get('Prefer'))
+                responses.append({'id': item.get('id'), 'status': recorded['status'],
+                                  'headers': recorded['headers'], 'body': recorded['body']})
+            return build_response(request, 200, {}, {'responses': responses})
+        recorded = self._next(request.method, request.url, request.headers.get('Prefer'))
+        return build_response(request, recorded['status'], recorded['headers'], recorded['body'])
+
+    def close(self):
+        pass
+
+
+class MockAdapter(HTTPAdapter):
+    """Sends Graph requests to a mock Graph server instead, keeping the path and query"""
+
+    def __init__(self, mock_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.mock_url = mock_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.mock_url}{graph_path(request.url)}" + (f"?{parts.query}" if parts.query else '')
+        return super().send(request, **kwargs)
+
+
+_mock_server = None
+_mock_lock = threading.Lock()
+
+
+def mock_url() -> str:
+    """GRAPH_MOCK_URL, or the address of a mock server started in-process on first use"""
+    global _mock_server
+    if Config.GRAPH_MOCK_URL:
+        return Config.GRAPH_MOCK_URL
+    with _mock_lock:
+        if _mock_server is None:
+            from mock_graph import MockGraph, start_mock_server
+            store = FixtureStore(Config.GRAPH_FIXTURES_DIR)
+            mock = MockGraph.from_fixtures(store) if len(store) else MockGraph.synthetic()
+            _mock_server = start_mock_server(mock)
+        return _mock_server.url
+
+
+def mount_transport(session, transport: str = None, mock_server_url: str = None, **adapter_options):
+    """
+    Mount the transport on the Graph host of a session
+
+    Args:
+        session: requests.Session GraphClient sends with
+        transport: One of TRANSPORTS (default: Config.GRAPH_TRANSPORT)
+        mock_server_url: Mock Graph server for the mock transport (default: mock_url())
+        adapter_options: Connection pool options for the HTTP-based transports
+    """
+    transport = transport or Config.GRAPH_TRANSPORT
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown Graph transport '{transport}' (expected one of: {', '.join(TRANSPORTS)})")
+    if transport == 'live':
+        return
+    if transport == 'record':
+        adapter = RecordingAdapter(FixtureStore(Config.GRAPH_FIXTURES_DIR), **adapter_options)
+    elif transport == 'replay':
+        adapter = ReplayAdapter(FixtureStore(Config.GRAPH_FIXTURES_DIR))
+    else:
+        adapter = MockAdapter(mock_server_url or mock_url(), **adapter_options)
+    host = urlsplit(Config.GRAPH_API_ENDPOINT)
+    session.mount(f'{host.scheme}://{host.netloc}/', adapter)
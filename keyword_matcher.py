@@ -0,0 +1,119 @@
+import re
+from typing import Iterable, List, Set, Iterator, Tuple
+
+# Characters that count as part of a word when checking keyword boundaries
+_WORD_CHAR = '[A-Za-z0-9]'
+
+
+class KeywordMatcher:
+    """
+    Finds whole-word occurrences of a keyword vocabulary in a single pass.
+
+    The keywords are folded into a character trie and compiled into one regular
+    expression, so each position in the text is tested against the trie rather
+    than against every keyword. Adding keywords grows the trie, not the number
+    of scans. Multi-word keywords match across any run of whitespace.
+
+    Every keyword occurrence is reported, including keywords that share a
+    start ('nvidia' and 'nvidia ai'); find_spans picks leftmost-longest
+    matches among them.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = {self.normalize(k) for k in keywords if k and k.strip()}
+
+        self._trie = trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True  # End-of-keyword marker
+
+        if self.keywords:
+            # Zero-width lookahead so keywords starting inside another match
+            # ('review' inside 'technical review') are found too; the
+            # expression only reports the longest keyword at each start
+            self.pattern = re.compile(
+                f'(?<!{_WORD_CHAR})(?=({self._compile_trie(trie)})(?!{_WORD_CHAR}))',
+                re.IGNORECASE
+            )
+        else:
+            self.pattern = None
+
+    @staticmethod
+    def normalize(keyword: str) -> str:
+        """Lowercase a keyword and collapse internal whitespace"""
+        return ' '.join(keyword.lower().split())
+
+    def _compile_trie(self, node: dict) -> str:
+        """Turn a character trie into a regex, longest alternative first"""
+        alternatives = []
+        for char in sorted(k for k in node if k != ''):
+            atom = r'\s+' if char == ' ' else re.escape(char)
+            alternatives.append(atom + self._compile_trie(node[char]))
+
+        if not alternatives:
+            return ''
+
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        # A keyword ending here makes the rest of the branch optional (greedy, so longest wins)
+        return f'(?:{body})?' if '' in node else body
+
+    def _shorter_matches(self, text: str, start: int, end: int) -> List[Tuple[int, int, str]]:
+        """Whole-word keywords starting at `start` that end before `end`, longest first"""
+        matches = []
+        node = self._trie
+        position = start
+        while position < end:
+            if text[position].isspace():
+                node = node.get(' ')
+                while position < end and text[position].isspace():
+                    position += 1
+            else:
+                node = node.get(text[position].lower())
+                position += 1
+            if node is None:
+                break
+            if '' in node and position < end and not re.match(_WORD_CHAR, text[position]):
+                matches.append((start, position, self.normalize(text[start:position])))
+        return matches[::-1]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yield (start, end, keyword) for every whole-word keyword occurrence,
+        in order of start; keywords sharing a start come longest first
+        """
+        if self.pattern is None or not text:
+            return
+        for match in self.pattern.finditer(text):
+            start, end = match.span(1)
+            yield start, end, self.normalize(match.group(1))
+            yield from self._shorter_matches(text, start, end)
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of distinct keywords present in the text"""
+        return {keyword for _, _, keyword in self.finditer(text)}
+
+    def find_spans(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Return non-overlapping (start, end, keyword) matches, leftmost-longest
+        first, the way an entity recognizer would tag the text
+        """
+        spans = []
+        end = 0
+        for start, stop, keyword in self.finditer(text):
+            if start >= end:
+                spans.append((start, stop, keyword))
+                end = stop
+        return spans
+
+
+def load_keyword_file(path: str) -> Set[str]:
+    """Load one keyword per line, ignoring blank lines and '#' comments"""
+    keywords = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                keywords.add(line)
+    return keywords
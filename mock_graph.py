@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Mock Microsoft Graph API
+
+A small local stand-in for the parts of Graph this app uses - /me,
+/me/calendarView (and its delta query), SentItems messages (and their delta
+query), $select, $count, $top paging through @odata.nextLink and $batch -
+serving a synthetic mailbox or the items of recorded fixtures. Responses
+carry ETags and If-None-Match is answered with 304. It can throttle every
+Nth request with 429 and Retry-After and add latency, so the fetch, retry,
+batching, caching and concurrency paths can be load-tested offline.
+
+Point the app at it with GRAPH_TRANSPORT=mock and GRAPH_MOCK_URL (no sign-in
+is needed); with GRAPH_TRANSPORT=mock alone an in-process server is started.
+
+Usage:
+    python3 mock_graph.py --port 8765 --documents 5000 --throttle-every 25 --latency-ms 80
+    GRAPH_TRANSPORT=mock GRAPH_MOCK_URL=http://127.0.0.1:8765/v1.0 python3 generate_draft.py
+"""
+
+import re
+import sys
+import json
+import time
+import html
+import base64
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from config import Config
+from graph_transport import FixtureStore, graph_path
+from synthetic_mailbox import OWNER, SyntheticMailbox
+
+# Graph's default and largest page sizes
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 999
+
+FILTER_BOUND = re.compile(r"(sentDateTime|receivedDateTime)\s+(ge|lt)\s+'?([0-9T:\-.Z]+)'?")
+TAG = re.compile(r'<[^>]+>')
+
+
+def _time(value) -> str:
+    """UTC 'YYYY-MM-DDTHH:MM:SS' from a Graph timestamp or {'dateTime': ...} value"""
+    if isinstance(value, dict):
+        value = value.get('dateTime')
+    return (value or '')[:19]
+
+
+def _token(state: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def _state(token: str) -> Optional[Dict]:
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except ValueError:
+        return None
+
+
+def _error(status: int, code: str, message: str) -> Tuple[int, Dict, Dict]:
+    return status, {}, {'error': {'code': code, 'message': message}}
+
+
+class MockGraph:
+    """
+    The mock's data and request handling, independent of the HTTP server
+
+    Events are ordered by start time, emails newest first (Graph's order for
+    sent items). Delta tokens encode the synced window; the data never
+    changes, so following one returns no changes.
+    """
+
+    def __init__(self, events: List[Dict], emails: List[Dict], profile: Dict = None, throttle_every: int = 0,
+                 retry_after: float = 1, latency: float = 0.0, link_base: str = Config.GRAPH_API_ENDPOINT):
+        """
+        Args:
+            events: Graph calendar event items
+            emails: Graph sent message items
+            profile: /me response (default: the synthetic mailbox owner)
+            throttle_every: Answer every Nth request (counting $batch sub-requests) with 429; 0 never throttles
+            retry_after: Retry-After seconds sent with a 429
+            latency: Seconds added to every HTTP round trip
+            link_base: Base of the nextLink/deltaLink URLs handed out (the public Graph
+                       endpoint, so clients follow them through the same transport)
+        """
+        self.events = sorted(events, key=lambda event: (_time(event.get('start')), event.get('id', '')))
+        self.emails = sorted(emails, key=lambda email: _time(email.get('sentDateTime')), reverse=True)
+        self.profile = profile or {
+            'id': 'mock-user', 'displayName': OWNER[0], 'mail': OWNER[1], 'userPrincipalName': OWNER[1]
+        }
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.link_base = link_base.rstrip('/')
+        self.stats = {'requests': 0, 'batches': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def synthetic(cls, documents: int = 1000, seed: int = 42, days: int = 30, **options) -> 'MockGraph':
+        """A mock serving a synthetic mailbox of the given size, half events and half emails"""
+        mailbox = SyntheticMailbox(documents // 2, documents - documents // 2, seed=seed, days=days)
+        events, emails = mailbox.shaped('graph')
+        return cls(events, emails, **options)
+
+    @classmethod
+    def from_fixtures(cls, store: FixtureStore, **options) -> 'MockGraph':
+        """A mock serving the profile, events and emails found in recorded fixtures"""
+        events, emails, profile = {}, {}, None
+        for fixture in store:
+            path = graph_path(fixture['key'].split(' ', 1)[1].split(' [')[0]).lower()
+            for recorded in fixture['responses']:
+                body = recorded.get('body')
+                if recorded.get('status') != 200 or not isinstance(body, dict):
+                    continue
+                if path == '/me':
+                    profile = body
+                items = events if path.startswith('/me/calendarview') else \
+                    emails if path.startswith('/me/mailfolders/sentitems/messages') else None
+                if items is not None:
+                    for item in body.get('value', []):
+                        if '@removed' not in item:
+                            items[item['id']] = item
+        return cls(list(events.values()), list(emails.values()), profile, **options)
+
+    def _throttled(self) -> bool:
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.throttle_every and self.stats['requests'] % self.throttle_every == 0:
+                self.stats['throttled'] += 1
+                return True
+        return False
+
+    def handle(self, method: str, url: str, headers: Dict, body: bytes = None) -> Tuple[int, Dict, object]:
+        """
+        Answer one request
+
+        Returns:
+            (status, response headers, JSON body)
+        """
+        path = graph_path(url)
+        if method == 'POST' and path == '/$batch':
+            with self._lock:
+                self.stats['batches'] += 1
+            return self._batch(json.loads(body or b'{}'))
+        if method != 'GET':
+            return _error(405, 'BadRequest', f'{method} is not supported by the mock')
+        if self._throttled():
+            status, _, error = _error(429, 'TooManyRequests', 'Mock throttling')
+            return status, {'Retry-After': str(self.retry_after)}, error
+
+        status, response_headers, payload = self._route(path, dict(parse_qsl(urlsplit(url).query)),
+                                                        headers.get('Prefer', ''))
+        if status == 200:
+            etag = 'W/"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:20] + '"'
+            if headers.get('If-None-Match') == etag:
+                return 304, {'ETag': etag}, None
+            response_headers = dict(response_headers, ETag=etag)
+        return status, response_headers, payload
+
+    def _route(self, path: str, query: Dict, prefer: str) -> Tuple[int, Dict, Dict]:
+        lowered = path.lower()
+        if lowered == '/me':
+            return 200, {}, self.profile
+        if lowered == '/me/calendarview':
+            return self._calendar_view(query, prefer)
+        if lowered == '/me/calendarview/delta':
+            return self._delta('calendar', query, prefer)
+        if lowered == '/me/mailfolders/sentitems/messages':
+            return self._messages(query, prefer)
+        if lowered == '/me/mailfolders/sentitems/messages/delta':
+            return self._delta('email', query, prefer)
+        return _error(404, 'ResourceNotFound', f'Resource not found for the segment {path!r}')
+
+    def _batch(self, request: Dict) -> Tuple[int, Dict, Dict]:
+        requests = request.get('requests', [])
+        if len(requests) > 20:
+            return _error(400, 'BadRequest', 'A $batch request can contain at most 20 requests')
+        responses = []
+        for item in requests:
+            status, headers, body = self.handle(item.get('method', 'GET').upper(), item.get('url', ''),
+                                                item.get('headers') or {})
+            responses.append({'id': item.get('id'), 'status': status,
+                              'headers': dict(headers, **{'Content-Type': 'application/json'}), 'body': body})
+        return 200, {}, {'responses': responses}
+
+    @staticmethod
+    def _project(item: Dict, select: Optional[str], text_body: bool) -> Dict:
+        if select:
+            fields = set(select.split(',')) | {'id'}
+            item = {key: value for key, value in item.items() if key in fields}
+        body = item.get('body')
+        if text_body and isinstance(body, dict) and body.get('contentType') == 'html':
+            text = html.unescape(TAG.sub(' ', re.sub(r'(?is)<(style|head)\b.*?</\1>', ' ', body.get('content', ''))))
+            item = dict(item, body={'contentType': 'text', 'content': ' '.join(text.split())})
+        return item
+
+    def _page(self, matches: List[Dict], query: Dict, prefer: str, path: str, page_size: int = None,
+              final_link: Tuple[str, str] = None) -> Tuple[int, Dict, Dict]:
+        """One page of a collection, with @odata.count and a $skip nextLink (or the final delta link)"""
+        text_body = 'outlook.body-content-type="text"' in prefer
+        skip = int(query.get('$skip', 0))
+        size = page_size or min(int(query.get('$top', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        page = {}
+        if query.get('$count') == 'true':
+            page['@odata.count'] = len(matches)
+        page['value'] = [self._project(item, query.get('$select'), text_body) for item in matches[skip:skip + size]]
+        if skip + size < len(matches):
+            next_query = dict(query, **{'$skip': skip + size})
+            page['@odata.nextLink'] = f"{self.link_base}{path}?{urlencode(next_query)}"
+        elif final_link:
+            page[final_link[0]] = final_link[1]
+        headers = {'Preference-Applied': 'outlook.body-content-type="text"'} if text_body else {}
+        return 200, headers, page
+
+    def _calendar_view(self, query: Dict, prefer: str) -> Tuple[int, Dict, Dict]:
+        if 'startDateTime' not in query or 'endDateTime' not in query:
+            return _error(400, 'ErrorInvalidParameter', 'startDateTime and endDateTime are required')
+        start, end = _time(query['startDateTime']), _time(query['endDateTime'])
+        matches = [event for event in self.events
+                   if _time(event.get('start')) < end and _time(event.get('end')) > start]
+        return self._page(matches, query, prefer, '/me/calendarView')
+
+    def _sent_window(self, filter_text: str) -> Tuple[str, str]:
+        start, end = '', '9999'
+        for _, operator, value in FILTER_BOUND.findall(filter_text or ''):
+            if operator == 'ge':
+                start = _time(value)
+            else:
+                end = _time(value)
+        return start, end
+
+    def _messages(self, query: Dict, prefer: str) -> Tuple[int, Dict, Dict]:
+        start, end = self._sent_window(query.get('$filter'))
+        matches = [email for email in self.emails if start <= _time(email.get('sentDateTime')) < end]
+        return self._page(matches, query, prefer, '/me/mailFolders/SentItems/messages')
+
+    def _delta(self, source: str, query: Dict, prefer: str) -> Tuple[int, Dict, Dict]:
+        path = '/me/calendarView/delta' if source == 'calendar' else '/me/mailFolders/SentItems/messages/delta'
+        page_size = re.search(r'odata\.maxpagesize=(\d+)', prefer)
+        page_size = min(int(page_size.group(1)), MAX_PAGE_SIZE) if page_size else DEFAULT_PAGE_SIZE
+        if '$deltatoken' in query:
+            state = _state(query['$deltatoken'])
+            if state is None or state.get('source') != source:
+                return _error(410, 'SyncStateNotFound', 'The sync state is invalid or expired')
+            # Nothing changes in the mock between syncs
+            delta_link = f"{self.link_base}{path}?{urlencode({'$deltatoken': query['$deltatoken']})}"
+            return 200, {}, {'value': [], '@odata.deltaLink': delta_link}
+
+        if source == 'calendar':
+            if 'startDateTime' not in query or 'endDateTime' not in query:
+                return _error(400, 'ErrorInvalidParameter', 'startDateTime and endDateTime are required')
+            start, end = _time(query['startDateTime']), _time(query['endDateTime'])
+            matches = [event for event in self.events
+                       if _time(event.get('start')) < end and _time(event.get('end')) > start]
+            # calendarView delta doesn't support $select
+            query = {key: value for key, value in query.items() if key != '$select'}
+        else:
+            start, _ = self._sent_window(query.get('$filter'))
+            matches = [email for email in self.emails if _time(email.get('sentDateTime')) >= start]
+        token = _token({'source': source, 'synced': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')})
+        delta_link = f"{self.link_base}{path}?{urlencode({'$deltatoken': token})}"
+        return self._page(matches, query, prefer, path, page_size, ('@odata.deltaLink', delta_link))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like Graph
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, method: str):
+        mock = self.server.mock
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        if mock.latency:
+            time.sleep(mock.latency)
+        status, headers, payload = mock.handle(method, self.path, self.headers, body)
+        content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        self._respond('POST')
+
+
+class MockGraphServer(ThreadingHTTPServer):
+    """HTTP server answering with a MockGraph; url is its API version root"""
+
+    daemon_threads = True
+
+    def __init__(self, mock: MockGraph, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.mock = mock
+        self.url = f"http://{host}:{self.server_address[1]}/v1.0"
+
+
+def start_mock_server(mock: MockGraph, host: str = '127.0.0.1', port: int = 0) -> MockGraphServer:
+    """Serve a mock on a background thread (port 0 picks a free one); stop it with shutdown()"""
+    server = MockGraphServer(mock, host, port)
+    threading.Thread(target=server.serve_forever, name='mock-graph', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Serve a mock Microsoft Graph API for offline runs and load tests")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: %(default)s)")
+    parser.add_argument('--fixtures', help="Serve the items of recorded fixtures from this directory")
+    parser.add_argument('--documents', type=int, default=1000,
+                        help="Synthetic mailbox size, half events and half emails (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=42, help="Synthetic mailbox random seed (default: %(default)s)")
+    parser.add_argument('--days', type=int, default=30, help="Days of synthetic history (default: %(default)s)")
+    parser.add_argument('--throttle-every', type=int, default=0,
+                        help="Answer every Nth request with 429 (default: never)")
+    parser.add_argument('--retry-after', type=float, default=1,
+                        help="Retry-After seconds sent with a 429 (default: %(default)s)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Latency added per round trip (default: none)")
+    args = parser.parse_args(argv)
+
+    options = {'throttle_every': args.throttle_every, 'retry_after': args.retry_after,
+               'latency': args.latency_ms / 1000}
+    if args.fixtures:
+        mock = MockGraph.from_fixtures(FixtureStore(args.fixtures), **options)
+    else:
+        mock = MockGraph.synthetic(args.documents, args.seed, args.days, **options)
+
+    server = MockGraphServer(mock, args.host, args.port)
+    print(f"✓ Mock Graph API serving {len(mock.events)} events and {len(mock.emails)} emails at {server.url}")
+    print(f"   Run against it with: GRAPH_TRANSPORT=mock GRAPH_MOCK_URL={server.url} python3 generate_draft.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {mock.stats['requests']} requests ({mock.stats['batches']} $batch calls), "
+              f"{mock.stats['throttled']} throttled")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-fetched copies of a document hash the same"""
+    return ' '.join(text.split())
+
+
+class NERCache:
+    """
+    Disk-backed cache of per-document analysis results (entities, keywords and
+    project matches), keyed by a content hash. Entries are evicted least
+    recently used first once the store grows past max_bytes.
+    """
+
+    def __init__(self, cache_file: str, max_bytes: int, namespace: str = ''):
+        """
+        Args:
+            cache_file: Path to the SQLite database backing the cache
+            max_bytes: Size budget for cached values before eviction kicks in
+            namespace: Mixed into every key (model name/version, vocabulary)
+                       so results from a different setup are never reused
+        """
+        self.cache_file = cache_file
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the cache usable from any thread
+        conn = sqlite3.connect(self.cache_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def key_for(self, text: str, namespace: str = '') -> str:
+        """Build the cache key for a document's text, optionally within a sub-namespace (e.g. NER mode)"""
+        payload = f"{self.namespace}\0{namespace}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Look up many keys at once; returns only the keys that were found"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                 [(now, key) for key in found])
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: List[Tuple[str, Dict]]):
+        """Store analysis results and evict old entries if over budget"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items:
+            encoded = json.dumps(value, separators=(',', ':'))
+            rows.append((key, encoded, len(encoded), now))
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the store is back under budget"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Free a little extra so we don't evict on every write
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used ASC"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict:
+        """Cumulative hit/miss counters plus the current size of the store"""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'size_bytes': size
+        }
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
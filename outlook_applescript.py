@@ -271,7 +271,7 @@ class OutlookAppleScriptReader:
             # Split by delimiter
             parts = block.split("|||")
             
-            if len(parts) >= 7:
+            if len(parts) >= 6:
                 event = {
                     'subject': parts[0].strip(),
                     'start': parts[1].strip(),
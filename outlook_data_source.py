@@ -7,8 +7,100 @@ This provides the best of both worlds:
 
 from outlook_applescript import OutlookAppleScriptReader
 from graph_client import GraphClient
+from graph_transport import OFFLINE_TRANSPORTS, OFFLINE_TOKEN
+from records import EventRecord, MessageRecord
+from profiling import Timeline
+from streaming import prefetch
+from delta_store import DeltaStore
+from response_cache import ResponseCache
 from auth import MSALAuth
+from config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import threading
+import os
+
+# Returned when neither AppleScript nor the Graph API can say who the user is
+UNKNOWN_PROFILE = {
+    'email': 'user@example.com',
+    'displayName': 'User',
+    'method': 'Unknown'
+}
+
+
+class SourceFetchError(Exception):
+    """Calendar events or sent emails could not be fetched; errors maps each failed source to its error"""
+    
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f"{source}: {error}" for source, error in errors.items()))
+
+
+class ConcurrentFetch:
+    """
+    The user profile, calendar events and sent emails of one run, fetched at
+    the same time on a three-thread pool instead of one after another.
+    
+    calendar_events and sent_emails are streams of normalized records that
+    are already downloading (at most max_items buffered each) by the time
+    the caller starts consuming them, so they can go straight into
+    DataAnalyzer.analyze_data. A source that fails raises SourceFetchError
+    from its stream, listing the error of every source that has failed so
+    far; a profile lookup that fails falls back to UNKNOWN_PROFILE and is
+    reported in errors as well.
+    """
+    
+    def __init__(self, data_source, days_back, timeline, max_items, fields):
+        self.errors = {}
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='fetch')
+        self._profile = self._executor.submit(self._fetch_profile, data_source, timeline)
+        self._downloads = [
+            prefetch(self._record_errors('calendar', data_source.iter_calendar_events(
+                days_back, timeline, fields.get('calendar'))), max_items, self._executor),
+            prefetch(self._record_errors('email', data_source.iter_sent_emails(
+                days_back, timeline, fields.get('email'))), max_items, self._executor)
+        ]
+        self.calendar_events = self._stream('calendar', self._downloads[0])
+        self.sent_emails = self._stream('email', self._downloads[1])
+    
+    def _fetch_profile(self, data_source, timeline):
+        try:
+            return data_source.fetch_user_profile(timeline)
+        except Exception as e:
+            self.errors['profile'] = str(e)
+            return dict(UNKNOWN_PROFILE)
+    
+    def _record_errors(self, source, iterable):
+        # Runs on the fetch thread, so a failure is known as soon as it happens
+        try:
+            yield from iterable
+        except Exception as e:
+            self.errors[source] = str(e)
+            raise
+    
+    def _stream(self, source, records):
+        try:
+            yield from records
+        except Exception as e:
+            self.errors.setdefault(source, str(e))
+            raise SourceFetchError(dict(self.errors)) from e
+    
+    def profile(self):
+        """The user profile (waits for the lookup to finish)"""
+        return self._profile.result()
+    
+    def close(self):
+        """Stop any downloads that are still running"""
+        for download in self._downloads:
+            download.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 class OutlookDataSource:
     """
@@ -16,20 +108,36 @@ class OutlookDataSource:
     Tries AppleScript first (local, no auth), falls back to Graph API (cloud, requires auth).
     """
     
-    def __init__(self):
-        """Initialize the data source"""
+    def __init__(self, use_applescript=True):
+        """
+        Initialize the data source
+        
+        Args:
+            use_applescript: Try local Outlook first; False always uses the Graph API
+        """
         self.applescript_reader = OutlookAppleScriptReader()
+        self.use_applescript = use_applescript
+        if not use_applescript:
+            self.applescript_reader.outlook_running = False
         self.auth_handler = MSALAuth()
         self.graph_client = None
         self.active_method = None
+        self._graph_lock = threading.Lock()  # Sources may be streamed from several threads at once
         
-    def _get_graph_client(self):
+    def _get_graph_client(self, timeline=None):
         """Get or create Graph API client (lazy initialization)"""
-        if self.graph_client is None:
-            print("\n📡 AppleScript not available, using Microsoft Graph API...")
-            print("This requires one-time authentication.\n")
-            access_token = self.auth_handler.get_access_token()
-            self.graph_client = GraphClient(access_token)
+        with self._graph_lock:
+            if self.graph_client is None:
+                if self.use_applescript:
+                    print("\n📡 AppleScript not available, using Microsoft Graph API...")
+                    print("This requires one-time authentication.\n")
+                with (timeline or Timeline()).span('auth.token'):
+                    if Config.GRAPH_TRANSPORT in OFFLINE_TRANSPORTS:
+                        # Replayed and mock responses don't need a Microsoft sign-in
+                        access_token = OFFLINE_TOKEN
+                    else:
+                        access_token = self.auth_handler.get_access_token()
+                self.graph_client = GraphClient(access_token)
         return self.graph_client
     
     def get_sent_emails(self, days_back=30):
@@ -98,18 +206,141 @@ class OutlookDataSource:
         except Exception as e:
             raise Exception(f"Failed to get calendar events from both sources: {str(e)}")
     
-    def get_user_profile(self):
+    def iter_sent_emails(self, days_back=30, timeline=None, fields=None):
+        """
+        Stream sent emails from the last N days, normalized to MessageRecords.
+        AppleScript returns everything at once; Graph API pages are fetched as they are consumed.
+        
+        Args:
+            days_back: Number of days to look back (default: 30)
+            timeline: Records the AppleScript read, token acquisition and each Graph page
+            fields: Graph message properties needed (AppleScript always reads everything)
+            
+        Yields:
+            MessageRecord objects
+        """
+        timeline = timeline or Timeline()
+        if self.applescript_reader.is_available():
+            emails = None
+            try:
+                print("📧 Reading sent emails from local Outlook (AppleScript)...")
+                with timeline.span('fetch.email.applescript') as span:
+                    emails = self.applescript_reader.get_sent_emails(days_back)
+                    span['items'] = len(emails)
+                self.active_method = 'AppleScript'
+                print(f"✓ Found {len(emails)} sent emails (via AppleScript)\n")
+            except Exception as e:
+                emails = None
+                print(f"⚠️  AppleScript failed: {str(e)}")
+                print("   Falling back to Microsoft Graph API...\n")
+            # Converted and yielded outside the try: once records have been handed out, an error
+            # must not be followed by the whole Graph result as well
+            if emails is not None:
+                yield from map(MessageRecord.from_applescript, emails)
+                return
+        
+        try:
+            client = self._get_graph_client(timeline)
+            self.active_method = 'Graph API'
+            print("📧 Streaming sent emails from Microsoft Graph API...")
+            yield from map(MessageRecord.from_graph, client.iter_sent_emails(days_back, timeline, fields))
+        except Exception as e:
+            raise Exception(f"Failed to get sent emails from both sources: {str(e)}")
+    
+    def iter_calendar_events(self, days_back=30, timeline=None, fields=None):
+        """
+        Stream calendar events from the last N days, normalized to EventRecords.
+        AppleScript returns everything at once; Graph API pages are fetched as they are consumed.
+        
+        Args:
+            days_back: Number of days to look back (default: 30)
+            timeline: Records the AppleScript read, token acquisition and each Graph page
+            fields: Graph event properties needed (AppleScript always reads everything)
+            
+        Yields:
+            EventRecord objects
+        """
+        timeline = timeline or Timeline()
+        if self.applescript_reader.is_available():
+            events = None
+            try:
+                print("📅 Reading calendar events from local Outlook (AppleScript)...")
+                with timeline.span('fetch.calendar.applescript') as span:
+                    events = self.applescript_reader.get_calendar_events(days_back)
+                    span['items'] = len(events)
+                self.active_method = 'AppleScript'
+                print(f"✓ Found {len(events)} calendar events (via AppleScript)\n")
+            except Exception as e:
+                events = None
+                print(f"⚠️  AppleScript failed: {str(e)}")
+                print("   Falling back to Microsoft Graph API...\n")
+            # Converted and yielded outside the try: once records have been handed out, an error
+            # must not be followed by the whole Graph result as well
+            if events is not None:
+                yield from map(EventRecord.from_applescript, events)
+                return
+        
+        try:
+            client = self._get_graph_client(timeline)
+            self.active_method = 'Graph API'
+            print("📅 Streaming calendar events from Microsoft Graph API...")
+            yield from map(EventRecord.from_graph, client.iter_calendar_events(days_back, timeline, fields))
+        except Exception as e:
+            raise Exception(f"Failed to get calendar events from both sources: {str(e)}")
+    
+    def fetch_all(self, days_back=30, timeline=None, max_items=None, fields=None):
+        """
+        Start fetching the user profile, calendar events and sent emails concurrently.
+        When the Graph API is needed, authentication happens first, on the calling thread.
+        
+        Args:
+            days_back: Number of days to look back (default: 30)
+            timeline: Records authentication, the profile lookup and each source's reads
+            max_items: Records buffered per source ahead of the consumer
+                       (default: Config.STREAM_PREFETCH_ITEMS)
+            fields: Graph properties needed per source, {'calendar': (...), 'email': (...)}
+                    (see analyzer.required_fields; default: everything)
+            
+        Returns:
+            ConcurrentFetch (close it, or use it as a context manager, when done)
+        """
+        timeline = timeline or Timeline()
+        if not self.applescript_reader.is_available():
+            self._get_graph_client(timeline).reset_payload_stats()
+        return ConcurrentFetch(self, days_back, timeline, max_items or Config.STREAM_PREFETCH_ITEMS, fields or {})
+    
+    def get_user_profile(self, timeline=None):
         """
         Get user profile information.
         Tries AppleScript first, falls back to Graph API.
         
+        Args:
+            timeline: Records the lookup as a 'fetch.profile' span
+        
+        Returns:
+            Dictionary with user profile info (UNKNOWN_PROFILE if neither source can provide it)
+        """
+        try:
+            return self.fetch_user_profile(timeline)
+        except Exception:
+            return dict(UNKNOWN_PROFILE)
+    
+    def fetch_user_profile(self, timeline=None):
+        """
+        Like get_user_profile, but raises if neither source can provide the profile
+        
+        Args:
+            timeline: Records the lookup as a 'fetch.profile' span
+        
         Returns:
-            Dictionary with user profile info
+            Dictionary with user profile info ('email', 'displayName' and 'method' always set)
         """
+        timeline = timeline or Timeline()
         # Try AppleScript first
         if self.applescript_reader.is_available():
             try:
-                email = self.applescript_reader.get_user_email()
+                with timeline.span('fetch.profile'):
+                    email = self.applescript_reader.get_user_email()
                 if email:
                     return {
                         'email': email,
@@ -120,17 +351,12 @@ class OutlookDataSource:
                 pass
         
         # Fallback to Graph API
-        try:
-            client = self._get_graph_client()
-            profile = client.get_user_profile()
-            profile['method'] = 'Graph API'
-            return profile
-        except Exception as e:
-            return {
-                'email': 'user@example.com',
-                'displayName': 'User',
-                'method': 'Unknown'
-            }
+        client = self._get_graph_client(timeline)
+        profile = client.get_user_profile(timeline)
+        profile['email'] = profile.get('mail') or profile.get('userPrincipalName', 'Unknown')
+        profile.setdefault('displayName', 'User')
+        profile['method'] = 'Graph API'
+        return profile
     
     def test_connection(self):
         """
@@ -197,6 +423,25 @@ class OutlookDataSource:
         
         return result
     
+    def get_http_stats(self, timeline=None):
+        """
+        Graph API request, retry and throttle counts so far, or only those of
+        the run recorded in `timeline` (empty until the Graph API has been used)
+        """
+        return self.graph_client.http_stats(timeline) if self.graph_client is not None else {}
+    
+    def get_payload_stats(self):
+        """Graph items and bytes received per source, with the estimated bytes field projection saved"""
+        return self.graph_client.payload_stats() if self.graph_client is not None else {}
+    
+    def get_sync_stats(self):
+        """How the last Graph delta sync of each source went (empty without delta sync)"""
+        return dict(self.graph_client.sync_stats) if self.graph_client is not None else {}
+    
+    def get_graph_cache_stats(self):
+        """Graph response cache hits, revalidations and misses (None when the cache is off)"""
+        return self.graph_client.cache_stats() if self.graph_client is not None else None
+    
     def get_active_method(self):
         """Get the currently active data retrieval method"""
         return self.active_method or 'Not yet determined'
@@ -207,10 +452,14 @@ class OutlookDataSource:
         print("🔄 Forced to use Microsoft Graph API\n")
     
     def clear_graph_cache(self):
-        """Clear the Graph API token cache (force re-authentication)"""
+        """Clear the Graph API token cache (force re-authentication), the delta item store and the response cache"""
         try:
             self.auth_handler.clear_cache()
             self.graph_client = None
+            if os.path.exists(Config.GRAPH_DELTA_FILE):
+                DeltaStore(Config.GRAPH_DELTA_FILE).clear()
+            if os.path.exists(Config.GRAPH_CACHE_FILE):
+                ResponseCache(Config.GRAPH_CACHE_FILE, 0, {}).clear()
             print("✓ Graph API token cache cleared\n")
         except Exception as e:
             print(f"⚠️  Failed to clear cache: {str(e)}\n")
@@ -10,15 +10,16 @@ class OutlookLocalReader:
     No authentication or API keys required!
     """
     
-    def __init__(self, profile_name="Main Profile"):
+    def __init__(self, profile_name="Main Profile", db_path=None):
         """
         Initialize the Outlook local database reader
         
         Args:
             profile_name: Name of the Outlook profile (default: "Main Profile")
+            db_path: Path of an Outlook.sqlite to read instead of the profile's
         """
         self.profile_name = profile_name
-        self.db_path = self._find_outlook_database()
+        self.db_path = db_path or self._find_outlook_database()
         
     def _find_outlook_database(self):
         """Find the Outlook SQLite database on Mac"""
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+class Timeline:
+    """
+    Wall-clock spans for one pipeline run (auth, fetches, analyzer phases,
+    rendering). Spans may be opened from any thread - Graph pages are fetched
+    on prefetch threads while the analyzer runs - and nest per thread.
+
+    Work that happens thousands of times per run (e.g. normalizing one
+    document) is accumulated with add() instead of recording a span per call,
+    and events worth counting per run (e.g. Graph requests and retries) with
+    count().
+    Stage totals are inclusive: a stage's seconds include its nested stages.
+
+    With trace_memory, spans opened on the thread that created the timeline
+    also record the peak tracemalloc-traced memory during the span (allocations
+    from every thread count), the traced memory left at its end and the
+    process's peak RSS so far, and each top-level span leaves a snapshot of its
+    largest allocation sites in memory_snapshots.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.memory_snapshots: Dict[str, List[Dict]] = {}
+        self._totals: Dict[str, Dict] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.trace_memory = trace_memory
+        self._owner = threading.get_ident()
+        self._peaks: List[int] = []  # Peak traced bytes of each open memory span, innermost last
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time a block. Yields the span's attribute dict, so counts only known
+        at the end (items, pages) can be filled in by the caller.
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        parent = stack[-1] if stack else None
+        with self._lock:
+            # Register the stage now so parents are listed before their children
+            self._totals.setdefault(name, {'seconds': 0.0, 'calls': 0, 'items': 0})
+        traced = self.trace_memory and threading.get_ident() == self._owner and tracemalloc.is_tracing()
+        if traced:
+            self._open_memory_span()
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            if traced:
+                self._close_memory_span(name, attributes, top_level=parent is None)
+            with self._lock:
+                self.spans.append({
+                    'name': name,
+                    'parent': parent,
+                    'thread': threading.current_thread().name,
+                    'start': round(start - self.started, 6),
+                    'seconds': round(seconds, 6),
+                    **attributes
+                })
+            self.add(name, seconds, attributes.get('items', 0), attributes.get('peak_kb'))
+
+    def _open_memory_span(self):
+        # tracemalloc keeps a single peak, so fold the enclosing span's peak so
+        # far into its slot before resetting it for this span
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+
+    def _close_memory_span(self, name: str, attributes: Dict, top_level: bool):
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(self._peaks.pop(), peak)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        attributes['peak_kb'] = round(peak / 1024)
+        attributes['traced_kb'] = round(current / 1024)
+        attributes['rss_peak_kb'] = peak_rss_kb()
+        if top_level:
+            self.memory_snapshots[name] = top_allocations(tracemalloc.take_snapshot())
+
+    def add(self, name: str, seconds: float, items: int = 0, peak_kb: int = None):
+        """Accumulate time (and optionally an item count) into a stage without recording a span"""
+        with self._lock:
+            total = self._totals.setdefault(name, {'seconds': 0.0, 'calls': 0, 'items': 0})
+            total['seconds'] += seconds
+            total['calls'] += 1
+            total['items'] += items
+            if peak_kb is not None:
+                total['peak_kb'] = max(total.get('peak_kb', 0), peak_kb)
+
+    def count(self, name: str, amount: float = 1):
+        """Add to a named counter of this run"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def stages(self) -> Dict[str, Dict]:
+        """Per-stage totals in the order stages were first recorded (peak_kb only for memory-traced stages)"""
+        with self._lock:
+            return {
+                name: {
+                    'seconds': round(total['seconds'], 3), 'calls': total['calls'], 'items': total['items'],
+                    **({'peak_kb': total['peak_kb']} if 'peak_kb' in total else {})
+                }
+                for name, total in self._totals.items()
+            }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start'])
+        data = {'stages': self.stages(), 'counters': self.counters(), 'spans': spans}
+        if self.trace_memory:
+            data['memory'] = {'rss_peak_kb': peak_rss_kb(), 'snapshots': self.memory_snapshots}
+        return data
+
+    def write_json(self, path: str):
+        """Write the stage totals and every span for offline inspection"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KB (0 where the platform doesn't report it)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = 5) -> List[Dict]:
+    """The source lines holding the most traced memory in a snapshot"""
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return [
+        {
+            'location': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024),
+            'count': stat.count
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def format_stages(stages: Dict[str, Dict]) -> List[str]:
+    """One aligned line per stage, indented under whichever of its dotted prefixes are stages too"""
+    lines = []
+    for name, total in stages.items():
+        parts = name.split('.')
+        depth = sum('.'.join(parts[:end]) in stages for end in range(1, len(parts)))
+        label = '  ' * depth + name
+        detail = f"{total['calls']} calls" if total['calls'] > 1 else ''
+        if total['items']:
+            detail = f"{detail}, {total['items']} items" if detail else f"{total['items']} items"
+        if 'peak_kb' in total:
+            peak = f"peak {total['peak_kb'] / 1024:.1f} MB"
+            detail = f"{detail}, {peak}" if detail else peak
+        lines.append(f"{label:<34} {total['seconds']:>8.3f}s  {detail}".rstrip())
+    return lines
+
+
+def start_profiler() -> cProfile.Profile:
+    """Start collecting a cProfile profile of the calling thread"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def write_profile(profiler: cProfile.Profile, timeline: Timeline, output_dir: str = "./output") -> Tuple[str, str]:
+    """
+    Stop the profiler and write its pstats dump and the span timeline
+
+    Returns:
+        (pstats path, timeline JSON path)
+    """
+    profiler.disable()
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    stem = Path(output_dir) / f"profile_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}"
+    pstats_path = f"{stem}.pstats"
+    timeline_path = f"{stem}.timeline.json"
+    profiler.dump_stats(pstats_path)
+    timeline.write_json(timeline_path)
+    return pstats_path, timeline_path
@@ -0,0 +1,229 @@
+"""
+Compact, source-independent message and event records.
+
+The Graph API, AppleScript and local SQLite readers all return differently
+shaped dicts. Each source is normalized into these records once, at the edge,
+so the analyzer reads plain attributes instead of probing nested dicts.
+Records use __slots__ (no per-instance __dict__), and addresses and domains
+are interned, so the thousands of copies of a colleague's or customer's
+address in a mailbox share one string.
+"""
+
+import re
+import sys
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+_ADDRESS_RE = re.compile(r'[\w.+\'-]+@[\w-]+(?:\.[\w-]+)+')
+
+# AppleScript's 'date as string' output, which follows the macOS locale
+_APPLESCRIPT_DATE_FORMATS = (
+    '%A, %B %d, %Y at %I:%M:%S %p',
+    '%A, %d %B %Y at %H:%M:%S',
+    '%A, %B %d, %Y %I:%M:%S %p',
+    '%m/%d/%Y %I:%M:%S %p',
+)
+
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value.strip().lower()) if value else ''
+
+
+def _addresses(values: Iterable[str]) -> Tuple[str, ...]:
+    """Interned, lowercased addresses"""
+    return tuple(_intern(value) for value in values if value)
+
+
+def _domains(addresses: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Interned domain of each address, in address order"""
+    return tuple(sys.intern(address.rsplit('@', 1)[1]) for address in addresses if '@' in address)
+
+
+def _graph_addresses(recipients) -> Tuple[str, ...]:
+    """Addresses from Graph [{'emailAddress': {'address': ...}}] lists"""
+    return _addresses((recipient.get('emailAddress') or {}).get('address') for recipient in recipients or [])
+
+
+def _text_addresses(text) -> Tuple[str, ...]:
+    """Addresses found in 'Name <address>; ...' style strings or lists of them"""
+    if isinstance(text, (list, tuple)):
+        text = '; '.join(item for item in text if isinstance(item, str))
+    return _addresses(_ADDRESS_RE.findall(text or ''))
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Parse ISO-8601 strings, Graph {'dateTime': ...} values, AppleScript dates and Unix timestamps"""
+    if isinstance(value, dict):
+        value = value.get('dateTime')
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        # Graph uses 7 fractional digits and a trailing Z, which fromisoformat doesn't accept
+        return datetime.fromisoformat(value[:19])
+    except ValueError:
+        pass
+    for date_format in _APPLESCRIPT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+class MessageRecord:
+    """A sent email"""
+
+    __slots__ = ('id', 'subject', 'preview', 'sent', 'recipients', 'domains', 'source')
+
+    def __init__(self, id, subject: str, preview: str, sent: Optional[datetime],
+                 recipients: Tuple[str, ...], source: str):
+        self.id = id
+        self.subject = subject or ''
+        self.preview = preview or ''
+        self.sent = sent
+        self.recipients = recipients
+        self.domains = _domains(recipients)
+        self.source = source
+
+    @classmethod
+    def from_graph(cls, message: dict) -> 'MessageRecord':
+        """From a Graph /messages item"""
+        return cls(
+            message.get('id'),
+            message.get('subject'),
+            message.get('bodyPreview'),
+            parse_datetime(message.get('sentDateTime')),
+            _graph_addresses(message.get('toRecipients')) + _graph_addresses(message.get('ccRecipients')),
+            'graph'
+        )
+
+    @classmethod
+    def from_applescript(cls, message: dict) -> 'MessageRecord':
+        """From OutlookAppleScriptReader.get_sent_emails"""
+        return cls(
+            message.get('id'),
+            message.get('subject'),
+            message.get('preview') or message.get('body'),
+            parse_datetime(message.get('sent_date')),
+            _text_addresses(message.get('recipients')),
+            'applescript'
+        )
+
+    @classmethod
+    def from_local(cls, message: dict) -> 'MessageRecord':
+        """From OutlookLocalReader.get_sent_emails"""
+        return cls(
+            message.get('id'),
+            message.get('subject'),
+            message.get('preview') or message.get('body'),
+            parse_datetime(message.get('sent_date')),
+            _text_addresses(message.get('recipients')) or _text_addresses(message.get('to_display')),
+            'local'
+        )
+
+
+class EventRecord:
+    """A calendar event (or one occurrence of a recurring one)"""
+
+    __slots__ = ('id', 'subject', 'body', 'body_type', 'start', 'end', 'organizer',
+                 'attendee_count', 'series', 'source')
+
+    def __init__(self, id, subject: str, body: str, body_type: Optional[str], start: Optional[datetime],
+                 end: Optional[datetime], organizer: str, attendee_count: int, series: Optional[str],
+                 source: str):
+        self.id = id
+        self.subject = subject or ''
+        self.body = body or ''
+        self.body_type = body_type
+        self.start = start
+        self.end = end
+        self.organizer = organizer
+        self.attendee_count = attendee_count
+        self.series = series
+        self.source = source
+
+    @property
+    def duration_minutes(self) -> float:
+        """Length of the meeting; 0 when unknown"""
+        if self.start is None or self.end is None:
+            return 0.0
+        return max((self.end - self.start).total_seconds() / 60, 0.0)
+
+    @classmethod
+    def from_graph(cls, event: dict) -> 'EventRecord':
+        """From a Graph /calendarView item"""
+        body = event.get('body') or {}
+        organizer = (event.get('organizer') or {}).get('emailAddress') or {}
+        return cls(
+            event.get('id'),
+            event.get('subject'),
+            body.get('content'),
+            body.get('contentType'),
+            parse_datetime(event.get('start')),
+            parse_datetime(event.get('end')),
+            _intern(organizer.get('address')),
+            len(event.get('attendees') or []),
+            event.get('seriesMasterId'),
+            'graph'
+        )
+
+    @classmethod
+    def from_applescript(cls, event: dict) -> 'EventRecord':
+        """From OutlookAppleScriptReader.get_calendar_events"""
+        attendees = event.get('attendee_list')
+        if attendees is None:
+            attendees = [item for item in (event.get('attendees') or '').split(';') if item.strip()]
+        return cls(
+            event.get('id'),
+            event.get('subject'),
+            event.get('body'),
+            None,
+            parse_datetime(event.get('start')),
+            parse_datetime(event.get('end')),
+            _intern(event.get('organizer')),
+            len(attendees),
+            None,
+            'applescript'
+        )
+
+    @classmethod
+    def from_local(cls, event: dict) -> 'EventRecord':
+        """From OutlookLocalReader.get_calendar_events"""
+        return cls(
+            event.get('id'),
+            event.get('subject'),
+            event.get('body'),
+            None,
+            parse_datetime(event.get('start')),
+            parse_datetime(event.get('end')),
+            _intern(event.get('organizer')),
+            event.get('attendee_count') or len(event.get('attendees') or []),
+            None,
+            'local'
+        )
+
+
+def as_message(message) -> MessageRecord:
+    """Normalize a message from any source, recognizing the source by its shape"""
+    if isinstance(message, MessageRecord):
+        return message
+    if 'bodyPreview' in message or 'toRecipients' in message or 'sentDateTime' in message:
+        return MessageRecord.from_graph(message)
+    if 'data_file' in message or 'to_display' in message:
+        return MessageRecord.from_local(message)
+    return MessageRecord.from_applescript(message)
+
+
+def as_event(event) -> EventRecord:
+    """Normalize a calendar event from any source, recognizing the source by its shape"""
+    if isinstance(event, EventRecord):
+        return event
+    if isinstance(event.get('body'), dict) or isinstance(event.get('start'), dict) or 'seriesMasterId' in event:
+        return EventRecord.from_graph(event)
+    if 'data_file' in event or 'attendee_count' in event:
+        return EventRecord.from_local(event)
+    return EventRecord.from_applescript(event)
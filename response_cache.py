@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import zlib
+import base64
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from requests.structures import CaseInsensitiveDict
+from graph_transport import graph_path
+
+# Endpoint classes with their own TTL; delta queries are never cached (each link is one-shot sync state)
+ENDPOINT_CLASSES = ('profile', 'pages', 'metadata')
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Preference-Applied')
+
+
+def endpoint_class(url: str) -> Optional[str]:
+    """
+    Which TTL applies to a Graph URL: 'profile' (/me), 'pages' (calendar and
+    mail collection pages, $count probes included), 'metadata' (any other
+    lookup, e.g. /me/photo/$value or /me/mailboxSettings) or None for
+    delta queries, which are never cached
+    """
+    path = graph_path(url).lower()
+    if path.endswith('/delta'):
+        return None
+    if path == '/me':
+        return 'profile'
+    if path == '/me/calendarview' or (path.startswith('/me/mailfolders/') and path.endswith('/messages')):
+        return 'pages'
+    return 'metadata'
+
+
+def account_id(access_token: str) -> str:
+    """
+    Whose responses a token fetches, to keep accounts sharing a cache file
+    apart: the tenant and object id claims of a JWT access token, or a hash
+    of the token itself when it isn't one (e.g. personal accounts' tokens),
+    which is safe but only shares entries until the token is refreshed
+    """
+    try:
+        payload = access_token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        if claims.get('oid'):
+            return f"{claims.get('tid', '')}:{claims['oid']}"
+    except (IndexError, ValueError, AttributeError):
+        pass
+    return 'token:' + hashlib.sha256(access_token.encode('utf-8')).hexdigest()[:32]
+
+
+class CachedResponse:
+    """A response served from the cache, with the parts of requests.Response GraphClient uses"""
+
+    def __init__(self, url: str, entry: Dict):
+        self.url = url
+        self.status_code = entry['status']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self._body = entry['body']
+
+    @property
+    def content(self) -> bytes:
+        return zlib.decompress(self._body)
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """The body, decompressed at most chunk_size bytes at a time"""
+        decompressor = zlib.decompressobj()
+        pending = self._body
+        while pending:
+            chunk = decompressor.decompress(pending, chunk_size)
+            pending = decompressor.unconsumed_tail
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CachingResponse:
+    """
+    A streamed response that is compressed into the cache as the caller
+    reads it; only a body read to the end is stored. Everything other than
+    iter_content is the wrapped response's.
+    """
+
+    def __init__(self, response, on_complete: Callable[[bytes], None]):
+        self._response = response
+        self._on_complete = on_complete
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+        compressor = zlib.compressobj()
+        parts = []
+        for chunk in self._response.iter_content(chunk_size):
+            parts.append(compressor.compress(chunk))
+            yield chunk
+        parts.append(compressor.flush())
+        self._on_complete(b''.join(parts))
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of Graph GET responses, keyed by account (see
+    account_id) and request (see graph_transport.fixture_key). An entry is
+    served as is until its endpoint's TTL runs out; after that, one that
+    came with an ETag is revalidated with If-None-Match, and a 304 Not
+    Modified serves it again for another TTL. Bodies are stored zlib-compressed and entries are
+    evicted least recently used first once the store grows past max_bytes.
+    """
+
+    def __init__(self, cache_file: str, max_bytes: int, ttls: Dict[str, float]):
+        """
+        Args:
+            cache_file: Path to the SQLite database backing the cache
+            max_bytes: Size budget for cached bodies before eviction kicks in
+            ttls: Seconds a response stays fresh per endpoint class (see ENDPOINT_CLASSES);
+                  0 stores only responses with an ETag and revalidates them every time
+        """
+        self.cache_file = cache_file
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self._counts = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evictions': 0}
+        self._lock = threading.Lock()  # Counters are updated from every fetch thread
+
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    expires REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the cache usable from any thread
+        conn = sqlite3.connect(self.cache_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ttl(self, url: str) -> Optional[float]:
+        """Freshness lifetime for a URL's responses; None if they are not cached"""
+        endpoint = endpoint_class(url)
+        return None if endpoint is None else self.ttls.get(endpoint, 0)
+
+    def count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The entry stored under a key ({'status', 'headers', 'body', 'etag', 'expires'}), or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, headers, body, etag, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return {'status': row[0], 'headers': json.loads(row[1]), 'body': row[2], 'etag': row[3], 'expires': row[4]}
+
+    def put(self, key: str, status: int, headers, body: bytes, ttl: float):
+        """
+        Store a response, its body already compressed; skipped when it could
+        never be served (no TTL and no ETag to revalidate with)
+        """
+        etag = headers.get('ETag')
+        if ttl <= 0 and not etag:
+            return
+        kept = {name: headers[name] for name in CACHED_HEADERS if name in headers}
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, etag, expires, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(kept), body, etag, now + ttl, len(body), now)
+            )
+            self._evict(conn)
+        self.count('stored')
+
+    def refresh(self, key: str, ttl: float):
+        """Serve an entry for another TTL after Graph confirmed it unchanged (304)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET expires = ?, last_used = ? WHERE key = ?", (now + ttl, now, key))
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the store is back under budget"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Free a little extra so we don't evict on every write
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        with self._lock:
+            self._counts['evictions'] += len(doomed)
+
+    def stats(self) -> Dict:
+        """
+        Cumulative counters plus the current size of the store. hit_rate
+        counts revalidated entries as hits: their body wasn't downloaded again.
+        """
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            stats = dict(self._counts)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['revalidated']) / lookups, 3) if lookups else 0.0
+        stats['entries'] = entries
+        stats['size_bytes'] = size
+        return stats
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
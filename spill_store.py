@@ -0,0 +1,161 @@
+import os
+import json
+import sqlite3
+import tempfile
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class SpillStore:
+    """
+    Temporary on-disk home for the state of one bounded-memory analysis run:
+    per-day entity aggregates and scoring rows (merged across spills),
+    documents held back for the incremental check, per-document digests and
+    references, and the postings and sentences behind the context index.
+    The database is deleted when the store is closed.
+
+    Used from the analyzer's consuming thread only.
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        Args:
+            directory: Where to create the database (default: the system temp directory)
+        """
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle, self.path = tempfile.mkstemp(prefix='analysis-spill-', suffix='.sqlite', dir=directory or None)
+        os.close(handle)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE days (day TEXT PRIMARY KEY, aggregates TEXT NOT NULL);
+            CREATE TABLE rows (day TEXT NOT NULL, row TEXT NOT NULL);
+            CREATE INDEX rows_day ON rows (day);
+            CREATE TABLE held (day TEXT NOT NULL, document TEXT NOT NULL);
+            CREATE INDEX held_day ON held (day);
+            CREATE TABLE documents (day TEXT NOT NULL, digest TEXT NOT NULL, ref TEXT NOT NULL);
+            CREATE INDEX documents_day ON documents (day);
+            CREATE TABLE event_digests (digest TEXT PRIMARY KEY);
+            CREATE TABLE sentences (kind INTEGER, doc INTEGER, sentences TEXT NOT NULL, PRIMARY KEY (kind, doc));
+            CREATE TABLE postings (token TEXT NOT NULL, posting INTEGER NOT NULL);
+        """)
+        self.spills = 0
+        self._indexed = False
+
+    # Undated documents are aggregated under day None, stored as ''
+    @staticmethod
+    def _key(day: Optional[str]) -> str:
+        return day or ''
+
+    def spill(self, daily_entities: Dict[str, Dict[str, Counter]], daily_rows: Dict[str, List[tuple]]):
+        """Merge in-memory per-day aggregates and scoring rows into the store"""
+        for day, entities in daily_entities.items():
+            merged = self.entities(day)
+            for entity_type, counts in entities.items():
+                merged.setdefault(entity_type, Counter()).update(counts)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO days (day, aggregates) VALUES (?, ?)",
+                (self._key(day), json.dumps({entity_type: dict(counts) for entity_type, counts in merged.items()}))
+            )
+        self._conn.executemany(
+            "INSERT INTO rows (day, row) VALUES (?, ?)",
+            ((self._key(day), json.dumps(row)) for day, rows in daily_rows.items() for row in rows)
+        )
+        self._conn.commit()
+        self.spills += 1
+
+    def days(self) -> List[Optional[str]]:
+        """Every day with spilled aggregates"""
+        return [day or None for (day,) in self._conn.execute("SELECT day FROM days")]
+
+    def entities(self, day: Optional[str]) -> Dict[str, Counter]:
+        """Entity Counters spilled for a day"""
+        row = self._conn.execute("SELECT aggregates FROM days WHERE day = ?", (self._key(day),)).fetchone()
+        if row is None:
+            return {}
+        return {entity_type: Counter(counts) for entity_type, counts in json.loads(row[0]).items()}
+
+    def rows(self, day: Optional[str]) -> List[list]:
+        """Scoring rows spilled for a day, in the order they were added"""
+        return [json.loads(row) for (row,) in self._conn.execute(
+            "SELECT row FROM rows WHERE day = ? ORDER BY rowid", (self._key(day),)
+        )]
+
+    def hold(self, day: str, document: tuple):
+        """Set a (kind, compact document) pair aside until its day is resolved"""
+        self._conn.execute("INSERT INTO held (day, document) VALUES (?, ?)", (day, json.dumps(document)))
+
+    def release(self, day: str) -> List[tuple]:
+        """Remove and return the documents held for a day, in the order they were held"""
+        documents = [tuple(json.loads(document)) for (document,) in self._conn.execute(
+            "SELECT document FROM held WHERE day = ? ORDER BY rowid", (day,)
+        )]
+        self._conn.execute("DELETE FROM held WHERE day = ?", (day,))
+        return documents
+
+    def held_days(self) -> List[str]:
+        """Days that still have documents held"""
+        return [day for (day,) in self._conn.execute("SELECT DISTINCT day FROM held ORDER BY day")]
+
+    def add_document(self, day: str, digest: str, ref: Dict):
+        """Record a dated document's digest and reference for the incremental store"""
+        self._conn.execute("INSERT INTO documents (day, digest, ref) VALUES (?, ?, ?)", (day, digest, json.dumps(ref)))
+
+    def digests(self, day: str) -> List[str]:
+        return [digest for (digest,) in self._conn.execute("SELECT digest FROM documents WHERE day = ?", (day,))]
+
+    def refs(self, day: str) -> List[Dict]:
+        return [json.loads(ref) for (ref,) in self._conn.execute(
+            "SELECT ref FROM documents WHERE day = ? ORDER BY rowid", (day,)
+        )]
+
+    def add_event_digest(self, digest: str):
+        self._conn.execute("INSERT OR IGNORE INTO event_digests VALUES (?)", (digest,))
+
+    def event_digest_count(self) -> int:
+        """Number of distinct event digests recorded"""
+        return self._conn.execute("SELECT COUNT(*) FROM event_digests").fetchone()[0]
+
+    def add_postings(self, postings: Dict[str, array]):
+        """Append context index postings (token -> packed postings)"""
+        self._conn.executemany(
+            "INSERT INTO postings (token, posting) VALUES (?, ?)",
+            ((token, posting) for token, token_postings in postings.items() for posting in token_postings)
+        )
+        self._indexed = False
+
+    def _index_postings(self):
+        # Built once, when the first lookup comes in, instead of maintained on every insert
+        if not self._indexed:
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_token ON postings (token, posting)")
+            self._indexed = True
+
+    def posting_count(self, token: str) -> int:
+        self._index_postings()
+        return self._conn.execute("SELECT COUNT(*) FROM postings WHERE token = ?", (token,)).fetchone()[0]
+
+    def postings(self, token: str) -> List[int]:
+        """A token's postings, sorted"""
+        self._index_postings()
+        return [posting for (posting,) in self._conn.execute(
+            "SELECT posting FROM postings WHERE token = ? ORDER BY posting", (token,)
+        )]
+
+    def put_sentences(self, kind: int, doc: int, sentences: List[str]):
+        self._conn.execute("INSERT OR REPLACE INTO sentences VALUES (?, ?, ?)", (kind, doc, json.dumps(sentences)))
+
+    def get_sentences(self, kind: int, doc: int) -> List[str]:
+        row = self._conn.execute("SELECT sentences FROM sentences WHERE kind = ? AND doc = ?", (kind, doc)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self):
+        """Close and delete the database"""
+        self._conn.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,213 @@
+import json
+import codecs
+import queue
+import threading
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Iterator
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable, max_items: int, executor: Executor = None) -> Iterator:
+    """
+    Drain an iterable on a background thread, buffering at most max_items.
+
+    Used to keep paged downloads running while the consumer is busy with NLP.
+    Lists and other in-memory sequences are returned as plain iterators since
+    there is nothing to overlap. Exceptions raised by the producer are
+    re-raised in the consumer.
+
+    The producer starts right away, on one of the executor's threads if one
+    is given, otherwise on a new daemon thread.
+    """
+    if isinstance(iterable, (list, tuple)) or max_items <= 0:
+        return iter(iterable)
+
+    buffer = queue.Queue(maxsize=max_items)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Re-check periodically so an abandoned consumer doesn't block us forever
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+
+    if executor is not None:
+        executor.submit(produce)
+    else:
+        threading.Thread(target=produce, name='prefetch', daemon=True).start()
+    return _Consumer(buffer, stop)
+
+
+class _Consumer:
+    """
+    The consuming end of prefetch(). Unlike a generator, closing it stops the
+    producer even if nothing was consumed yet.
+    """
+
+    def __init__(self, buffer: queue.Queue, stop: threading.Event):
+        self._buffer = buffer
+        self._stop = stop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Closing may happen on another thread while we wait, e.g. when the
+        # downstream consumer of a chained prefetch gives up
+        while True:
+            if self._stop.is_set():
+                raise StopIteration
+            try:
+                item = self._buffer.get(timeout=0.5)
+                break
+            except queue.Empty:
+                continue
+        if item is _DONE:
+            self.close()
+            raise StopIteration
+        if isinstance(item, _Failure):
+            self.close()
+            raise item.error
+        return item
+
+    def close(self):
+        """Stop the producer and drop anything still buffered"""
+        self._stop.set()
+
+    def __del__(self):
+        self._stop.set()
+
+
+class JsonObjectStream:
+    """
+    Incremental decoder for a JSON object whose bulk is one array member (a
+    Graph page's 'value', a $batch response's 'responses'), read from byte
+    chunks as they arrive (e.g. response.iter_content()).
+
+    Iterating yields the array's elements one at a time, each decoded with
+    JSONDecoder.raw_decode once all of it has arrived, so only the element
+    being decoded and the unread rest of the latest chunk are held rather
+    than the whole document. The object's other members are collected in
+    `members`, complete once iteration ends.
+    """
+
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, chunks: Iterable[bytes], array_key: str):
+        """
+        Args:
+            chunks: The raw JSON document, in pieces of any size
+            array_key: Member whose array elements are yielded
+        """
+        self.array_key = array_key
+        self.members: Dict = {}
+        self.bytes = 0  # Input read so far
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was already decoded; False at the end of the input"""
+        if self._exhausted:
+            return False
+        text = None
+        for chunk in self._chunks:
+            if chunk:
+                self.bytes += len(chunk)
+                # A multi-byte character split across chunks is held back until it completes
+                text = self._text.decode(chunk)
+                break
+        if text is None:
+            self._exhausted = True
+            text = self._text.decode(b'', final=True)
+        self._buffer = self._buffer[self._position:] + text
+        self._position = 0
+        return not self._exhausted
+
+    def _peek(self) -> str:
+        """The next non-whitespace character, reading more input as needed ('' at the end)"""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in self._WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def _expect(self, characters: str) -> str:
+        character = self._peek()
+        if not character or character not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", self._buffer, self._position)
+        self._position += 1
+        return character
+
+    def _value(self):
+        """Decode the next complete JSON value"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                # Most likely cut off at the end of the buffer
+                if not self._fill():
+                    raise
+                continue
+            # A number (or literal) ending at the edge of the buffer may go on in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def __iter__(self) -> Iterator:
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            self._end()
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.array_key:
+                yield from self._elements()
+            else:
+                self.members[key] = self._value()
+            if self._expect(',}') == '}':
+                self._end()
+                return
+
+    def _end(self):
+        """Read the input to its end (so the source is exhausted), allowing only trailing whitespace"""
+        if self._peek():
+            raise json.JSONDecodeError("Extra data", self._buffer, self._position)
+
+    def _elements(self) -> Iterator:
+        self._expect('[')
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
@@ -0,0 +1,30 @@
+import unittest
+from keyword_matcher import KeywordMatcher
+
+
+class KeywordMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = KeywordMatcher(['nvidia', 'nvidia ai', 'ai enterprise', 'dgx', 'dgx cloud',
+                                       'review', 'technical review'])
+
+    def test_prefix_sharing_keywords_are_all_found(self):
+        self.assertEqual(self.matcher.find("nvidia ai enterprise on dgx cloud"),
+                         {'nvidia', 'nvidia ai', 'ai enterprise', 'dgx', 'dgx cloud'})
+
+    def test_shorter_keyword_needs_a_word_boundary(self):
+        self.assertEqual(self.matcher.find("nvidiax dgxcloud"), set())
+        self.assertEqual(self.matcher.find("NVIDIA   AI Enterprise"), {'nvidia', 'nvidia ai', 'ai enterprise'})
+
+    def test_finditer_lists_longest_first_at_each_start(self):
+        self.assertEqual(list(self.matcher.finditer("a technical review")),
+                         [(2, 18, 'technical review'), (12, 18, 'review')])
+        self.assertEqual(list(self.matcher.finditer("dgx cloud")), [(0, 9, 'dgx cloud'), (0, 3, 'dgx')])
+
+    def test_find_spans_is_leftmost_longest(self):
+        self.assertEqual(self.matcher.find_spans("nvidia ai enterprise on dgx cloud"),
+                         [(0, 9, 'nvidia ai'), (24, 33, 'dgx cloud')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import json
+import zlib
+import base64
+import sqlite3
+import tempfile
+import unittest
+import requests
+from config import Config
+from graph_client import GraphClient
+from graph_transport import mount_transport
+from mock_graph import MockGraph, start_mock_server
+from response_cache import CachingResponse, ResponseCache, account_id, endpoint_class
+
+
+def fake_token(oid, tid='tenant-1'):
+    """An unsigned JWT carrying the claims account_id reads"""
+    claims = base64.urlsafe_b64encode(json.dumps({'oid': oid, 'tid': tid}).encode('utf-8')).decode('ascii').rstrip('=')
+    return f'header.{claims}.signature'
+
+
+class _StreamedResponse:
+    """The parts of a streamed requests.Response CachingResponse reads"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class EndpointClassTest(unittest.TestCase):
+
+    def test_endpoint_classes(self):
+        base = Config.GRAPH_API_ENDPOINT
+        self.assertEqual(endpoint_class(f'{base}/me'), 'profile')
+        self.assertEqual(endpoint_class(f'{base}/me/calendarview?$top=999'), 'pages')
+        self.assertEqual(endpoint_class(f'{base}/me/mailFolders/SentItems/messages'), 'pages')
+        self.assertEqual(endpoint_class(f'{base}/me/photo/$value'), 'metadata')
+
+    def test_delta_queries_are_not_cached(self):
+        base = Config.GRAPH_API_ENDPOINT
+        self.assertIsNone(endpoint_class(f'{base}/me/calendarView/delta?startDateTime=x'))
+        self.assertIsNone(endpoint_class(f'{base}/me/mailFolders/SentItems/messages/delta?$deltatoken=abc'))
+        cache = ResponseCache(':memory:', 1024, {'profile': 60, 'pages': 60, 'metadata': 60})
+        self.assertIsNone(cache.ttl(f'{base}/me/calendarView/delta'))
+
+
+class ResponseCacheStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.workdir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_unservable_responses_are_not_stored(self):
+        cache = ResponseCache(self.cache_file, 1024, {})
+        cache.put('no-ttl-no-etag', 200, {}, zlib.compress(b'{}'), 0)
+        self.assertIsNone(cache.get('no-ttl-no-etag'))
+        cache.put('etag-only', 200, {'ETag': 'W/"1"'}, zlib.compress(b'{}'), 0)
+        self.assertIsNotNone(cache.get('etag-only'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResponseCache(self.cache_file, 3000, {})
+        for index in range(6):
+            cache.put(f'key-{index}', 200, {}, os.urandom(1000), 60)
+            cache.get('key-0')  # Keep the first entry in use
+        self.assertIsNotNone(cache.get('key-0'))
+        self.assertIsNotNone(cache.get('key-5'))
+        self.assertIsNone(cache.get('key-1'))
+        stats = cache.stats()
+        self.assertGreater(stats['evictions'], 0)
+        self.assertLessEqual(stats['size_bytes'], 3000)
+
+    def test_streamed_body_is_stored_only_once_read_to_the_end(self):
+        body = json.dumps({'value': list(range(1000))}).encode('utf-8')
+        stored = []
+
+        partial = CachingResponse(_StreamedResponse(body), stored.append).iter_content(256)
+        next(partial)
+        partial.close()
+        self.assertEqual(stored, [])
+
+        chunks = list(CachingResponse(_StreamedResponse(body), stored.append).iter_content(256))
+        self.assertEqual(b''.join(chunks), body)
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(zlib.decompress(stored[0]), body)
+
+
+class ResponseCacheClientTest(unittest.TestCase):
+    """The cache in front of GraphClient, against the mock Graph server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockGraph.synthetic(100)
+        cls.server = start_mock_server(cls.mock)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.saved = Config.GRAPH_CACHE_FILE, Config.GRAPH_CACHE_PROFILE_TTL, dict(self.mock.profile)
+        Config.GRAPH_CACHE_FILE = os.path.join(self.workdir.name, 'graph_cache.sqlite')
+        Config.GRAPH_CACHE_PROFILE_TTL = 60
+
+    def tearDown(self):
+        Config.GRAPH_CACHE_FILE, Config.GRAPH_CACHE_PROFILE_TTL, self.mock.profile = self.saved
+        self.workdir.cleanup()
+
+    def client(self):
+        session = requests.Session()
+        mount_transport(session, 'mock', self.server.url, max_retries=0)
+        return GraphClient(fake_token('user-a'), session=session, use_delta=False, use_cache=True)
+
+    def expire_all(self):
+        with sqlite3.connect(Config.GRAPH_CACHE_FILE) as conn:
+            conn.execute("UPDATE responses SET expires = 0")
+        conn.close()
+
+    def test_fresh_entry_is_served_without_a_request(self):
+        client = self.client()
+        profile = client.get_user_profile()
+        requests_before = self.mock.stats['requests']
+        self.assertEqual(client.get_user_profile(), profile)
+        self.assertEqual(self.mock.stats['requests'], requests_before)
+        self.assertEqual(client.cache_stats()['hits'], 1)
+
+    def test_expired_entry_is_revalidated_and_refreshed(self):
+        client = self.client()
+        profile = client.get_user_profile()
+        self.expire_all()
+
+        requests_before = self.mock.stats['requests']
+        self.assertEqual(client.get_user_profile(), profile)
+        self.assertEqual(self.mock.stats['requests'], requests_before + 1)
+        self.assertEqual(client.cache_stats()['revalidated'], 1)
+
+        # The 304 made the entry fresh for another TTL
+        self.assertEqual(client.get_user_profile(), profile)
+        self.assertEqual(self.mock.stats['requests'], requests_before + 1)
+        self.assertEqual(client.cache_stats()['hits'], 1)
+
+    def test_changed_response_replaces_the_expired_entry(self):
+        client = self.client()
+        client.get_user_profile()
+        self.expire_all()
+        self.mock.profile = dict(self.mock.profile, displayName='Renamed User')
+
+        self.assertEqual(client.get_user_profile()['displayName'], 'Renamed User')
+        self.assertEqual(client.cache_stats()['revalidated'], 0)
+        self.assertEqual(client.get_user_profile()['displayName'], 'Renamed User')
+        self.assertEqual(client.cache_stats()['hits'], 1)
+
+    def test_pages_are_cached_only_once_fully_read(self):
+        client = self.client()
+        url = f'{client.base_url}/me/mailFolders/SentItems/messages'
+        page = client._stream_page(url, {'$top': 50})
+        next(page)
+        page.close()
+        self.assertEqual(client.cache_stats()['stored'], 0)
+
+        items = list(client._stream_page(url, {'$top': 50}))
+        self.assertEqual(client.cache_stats()['stored'], 1)
+        requests_before = self.mock.stats['requests']
+        self.assertEqual(list(client._stream_page(url, {'$top': 50})), items)
+        self.assertEqual(self.mock.stats['requests'], requests_before)
+
+
+class ResponseCacheAccountTest(unittest.TestCase):
+    """Accounts sharing GRAPH_CACHE_FILE must never be served each other's responses"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockGraph.synthetic(100)
+        cls.server = start_mock_server(cls.mock)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.saved_cache_file = Config.GRAPH_CACHE_FILE
+        Config.GRAPH_CACHE_FILE = os.path.join(self.workdir.name, 'graph_cache.sqlite')
+
+    def tearDown(self):
+        Config.GRAPH_CACHE_FILE = self.saved_cache_file
+        self.workdir.cleanup()
+
+    def client(self, token):
+        session = requests.Session()
+        mount_transport(session, 'mock', self.server.url, max_retries=0)
+        return GraphClient(token, session=session, use_delta=False, use_cache=True)
+
+    def test_account_id(self):
+        self.assertEqual(account_id(fake_token('user-a')), 'tenant-1:user-a')
+        self.assertNotEqual(account_id(fake_token('user-a')), account_id(fake_token('user-a', 'tenant-2')))
+        self.assertTrue(account_id('opaque-token').startswith('token:'))
+        self.assertNotEqual(account_id('opaque-token'), account_id('other-token'))
+
+    def test_switching_accounts_misses(self):
+        first = self.client(fake_token('user-a'))
+        first.get_user_profile()
+        first.get_sent_emails(7)
+        self.assertEqual(first.cache_stats()['hits'], 0)
+
+        requests_before = self.mock.stats['requests']
+        second = self.client(fake_token('user-b'))
+        second.get_user_profile()
+        second.get_sent_emails(7)
+        self.assertEqual(second.cache_stats()['hits'], 0)
+        self.assertGreater(self.mock.stats['requests'], requests_before)
+
+        again = self.client(fake_token('user-a'))
+        again.get_user_profile()
+        again.get_sent_emails(7)
+        self.assertGreater(again.cache_stats()['hits'], 0)
+        self.assertEqual(again.cache_stats()['misses'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from text_normalizer import normalize_document
+
+TEAMS_INVITE = """<html><body>
+<div>Agenda: review the Initech PoC numbers.</div>
+<div>________________________________________________________________________________</div>
+<div>Microsoft Teams meeting</div>
+<div>Join on your computer, mobile app or room device</div>
+<div><a href="https://teams.microsoft.com/l/meetup-join/1">Click here to join the meeting</a></div>
+<div>Meeting ID: 217 158 893 990</div>
+<div>Passcode: 893990</div>
+<div>________________________________________________________________________________</div>
+</body></html>"""
+
+ZOOM_INVITE = """Globex wants the inference benchmark by Friday.
+Join Zoom Meeting
+https://zoom.us/j/123456789
+Meeting ID: 123 4567 8901
+One tap mobile
++16465588656,,123456789# US (New York)
+Help | Privacy and security | Legal"""
+
+
+class NormalizeDocumentTest(unittest.TestCase):
+
+    def test_previews_keep_their_text(self):
+        previews = [
+            ("Join the meeting with Initech tomorrow to review the PoC numbers",
+             "Join the meeting with Initech tomorrow to review the PoC numbers"),
+            ("Legal: Initech signed the pilot agreement", "Legal: Initech signed the pilot agreement"),
+            ("Help: Globex needs the inference benchmark by Friday.",
+             "Help: Globex needs the inference benchmark by Friday."),
+            ("Meeting ID for the Globex review moved; see https://x.y", "Meeting ID for the Globex review moved; see"),
+            ("Call +1 555 123 4567,,123# https://x.y/z ok", "Call +1 555 123 4567,,123# ok"),
+        ]
+        for preview, expected in previews:
+            self.assertEqual(normalize_document(preview, 'text'), expected)
+
+    def test_invite_lines_written_by_the_user_survive(self):
+        for line in ("Join the meeting with Initech tomorrow to review the PoC numbers",
+                     "Legal: Initech signed the pilot agreement",
+                     "Help: Globex needs the inference benchmark by Friday.",
+                     "Meeting ID for the Globex review moved"):
+            self.assertEqual(normalize_document(line, 'text', invite=True), line)
+
+    def test_dial_string_is_removed_not_its_line(self):
+        self.assertEqual(normalize_document("Call +1 555 123 4567,,123# to reach Globex", 'text', invite=True),
+                         "Call to reach Globex")
+
+    def test_teams_join_block_is_stripped(self):
+        self.assertEqual(normalize_document(TEAMS_INVITE, 'html', invite=True),
+                         "Agenda: review the Initech PoC numbers.")
+
+    def test_zoom_join_lines_are_stripped(self):
+        self.assertEqual(normalize_document(ZOOM_INVITE, 'text', invite=True),
+                         "Globex wants the inference benchmark by Friday.")
+
+
+if __name__ == '__main__':
+    unittest.main()
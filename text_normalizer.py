@@ -0,0 +1,187 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import List
+
+# Elements whose content is never visible text
+_SKIPPED_TAGS = {'style', 'script', 'head', 'title', 'noscript', 'template', 'svg'}
+
+# Elements that start a new line when rendered
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'ol', 'p', 'pre',
+    'section', 'table', 'td', 'th', 'tr', 'ul'
+}
+
+# Bytes of markup parsed per feed() call; parsing stops once enough text was collected
+_FEED_CHUNK = 8192
+
+# Collect this many times the character budget before stopping, since
+# boilerplate is stripped after extraction
+_PARSE_HEADROOM = 4
+
+_URL_RE = re.compile(r'<?\b(?:https?://|www\.|mailto:|tel:)[^\s<>"]*>?', re.IGNORECASE)
+_SEPARATOR_RE = re.compile(r'^\s*[_=\-*~]{8,}\s*$')
+
+# Online meeting join blocks (Teams, Zoom, Webex) sit between separator lines
+_JOIN_BLOCK_MARKERS = re.compile(
+    r'microsoft teams|join zoom meeting|webex meeting|join the meeting|meeting id', re.IGNORECASE
+)
+
+# Teams invite footer entries, e.g. 'Help | Privacy and security | Legal'
+_FOOTER_ITEM = r'(?:for organizers|help|privacy and security|legal|meeting options|learn more|reset (?:dial-in )?pin)'
+
+# Individual lines of join-link noise that also appear outside a separated block
+# in invite bodies. Generic words only match a line that holds nothing else.
+_BOILERPLATE_LINES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^microsoft teams(?: meeting)?(?: need help\?)?$',
+    r'^join (?:on your computer|zoom meeting|with a video conferencing device|by phone)',
+    r'^join the meeting(?: now)?$',
+    r'^click here to join',
+    r'^(?:meeting|conference|phone conference|video conference) id\s*:?[\d\s]*$',
+    r'^(?:passcode|password|pin)\s*:',
+    r'^(?:download teams|join on the web|find a local number)',
+    r'^or call in',
+    r'^dial[- ]in|^one tap mobile|^dial by your location',
+    r'^\+\d[\d\s().-]{6,}(?:[,#*\d]*)(?:\s+[^\W\d][\w ,()-]*)?$',  # Dial-in numbers with their location
+    rf'^{_FOOTER_ITEM}(?:\s*[:|]\s*{_FOOTER_ITEM})*\s*:?$',
+)]
+
+# One-tap dial strings ('+1 555 123 4567,,123456#') inside a line; only the string itself is removed
+_DIAL_STRING_RE = re.compile(r'\+?\d[\d\s().-]{6,},,[\d,#*]+')
+
+
+class _TextExtractor(HTMLParser):
+    """HTMLParser that keeps visible text, with block elements on their own lines"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.length = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+            self.length += len(data)
+
+
+def html_to_text(html: str, max_chars: int = 0) -> str:
+    """
+    Extract visible text from HTML, dropping styles, scripts and comments.
+
+    Markup is parsed in chunks, and parsing stops early once comfortably more
+    text than max_chars has been collected, so a 50 KB invite costs about as
+    much as its first few KB.
+
+    Args:
+        html: HTML markup
+        max_chars: Character budget of the caller (0 for no limit)
+
+    Returns:
+        Text with one line per block element
+    """
+    extractor = _TextExtractor()
+    limit = max_chars * _PARSE_HEADROOM if max_chars else 0
+    for start in range(0, len(html), _FEED_CHUNK):
+        extractor.feed(html[start:start + _FEED_CHUNK])
+        if limit and extractor.length >= limit:
+            break
+    extractor.close()
+    return ''.join(extractor.parts)
+
+
+def strip_boilerplate(text: str, invite: bool = False) -> str:
+    """
+    Remove online meeting join blocks and URLs; with invite, also the
+    join-link lines and dial strings found outside a separated block
+
+    Args:
+        text: Plain text, one line per block element
+        invite: The text is a meeting invite body. Other text (e.g. an email
+                preview, a single line written by the user) keeps its lines.
+    """
+    lines = text.splitlines()
+
+    # Drop separator-delimited blocks that carry join instructions
+    kept = []
+    block = None
+    for line in lines:
+        if _SEPARATOR_RE.match(line):
+            if block is None:
+                block = []
+                continue
+            if not _JOIN_BLOCK_MARKERS.search('\n'.join(block)):
+                kept.extend(block)
+            block = None
+            continue
+        if block is not None:
+            block.append(line)
+        else:
+            kept.append(line)
+    if block is not None and not _JOIN_BLOCK_MARKERS.search('\n'.join(block)):
+        kept.extend(block)
+
+    cleaned = []
+    for line in kept:
+        line = _URL_RE.sub(' ', line).strip()
+        if invite:
+            if any(pattern.search(line) for pattern in _BOILERPLATE_LINES):
+                continue
+            line = _DIAL_STRING_RE.sub(' ', line).strip()
+        if line:
+            cleaned.append(line)
+    return '\n'.join(cleaned)
+
+
+def truncate(text: str, max_chars: int = 0, max_tokens: int = 0) -> str:
+    """Cut text to a character and/or whitespace-token budget, on a word boundary"""
+    if max_tokens:
+        tokens = text.split()
+        if len(tokens) > max_tokens:
+            text = ' '.join(tokens[:max_tokens])
+    if max_chars and len(text) > max_chars:
+        cut = text.rfind(' ', 0, max_chars + 1)
+        text = text[:cut if cut > 0 else max_chars]
+    return text
+
+
+def normalize_document(content: str, content_type: str = None, max_chars: int = 0, max_tokens: int = 0,
+                       invite: bool = False) -> str:
+    """
+    Turn a document body into the plain text worth analyzing.
+
+    Args:
+        content: Body as delivered by the source
+        content_type: 'html' or 'text' (Graph's body.contentType); markup is
+                      also detected when no type is given
+        max_chars: Character budget for the result (0 for no limit)
+        max_tokens: Whitespace-token budget for the result (0 for no limit)
+        invite: The content is a meeting invite body, so individual join-link
+                lines are dropped too (see strip_boilerplate)
+
+    Returns:
+        Boilerplate-free text on a single line, within budget
+    """
+    if not content:
+        return ''
+    if content_type is None:
+        content_type = 'html' if content.lstrip().startswith('<') else 'text'
+    if content_type.lower() == 'html':
+        content = html_to_text(content, max_chars)
+    else:
+        content = unescape(content) if '&' in content else content
+    text = ' '.join(strip_boilerplate(content, invite).split())
+    return truncate(text, max_chars, max_tokens)